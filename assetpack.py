@@ -0,0 +1,128 @@
+import os
+import sys
+import json
+import mmap
+import struct
+import pygame
+
+# Archive layout: magic, index length, JSON index, then 16-byte aligned
+# entries. Images are stored as raw BGRA pixels, which is the layout
+# convert_alpha() produces on a 32-bit display, so they can be wrapped in a
+# Surface straight from the mapped file. Audio is stored as the original file.
+# Each entry records the size and mtime of the file it was packed from, so
+# an entry whose file has changed since is skipped for the file itself.
+MAGIC = b'UPAK0001'
+HEADER = struct.Struct('<8sI')
+ALIGN = 16
+PACK_NAME = 'assets.pak'
+IMAGE_FORMAT = 'BGRA'
+
+
+# Where the archive lives: next to the game, or in the installed folder of
+# the PyInstaller build, which is where sys._MEIPASS points for a onedir
+# bundle, so the file is mapped where it was installed
+def pack_path():
+    base = getattr(sys, '_MEIPASS', os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base, PACK_NAME)
+
+
+def build(path=None, manifest=None):
+    if manifest is None:
+        from assets import MANIFEST as manifest
+    index = {}
+    blobs = []
+    offset = 0
+    for name, (file_path, kind) in manifest.items():
+        if kind == 'image':
+            image = pygame.image.load(file_path)
+            # Drawn onto a transparent surface, so a colorkey becomes alpha
+            # as it would with convert_alpha()
+            pixels = pygame.Surface(image.get_size(), pygame.SRCALPHA, 32)
+            pixels.blit(image, (0, 0))
+            data = pygame.image.tobytes(pixels, IMAGE_FORMAT)
+            entry = {'kind': kind, 'size': image.get_size(), 'format': IMAGE_FORMAT}
+        else:
+            with open(file_path, 'rb') as file:
+                data = file.read()
+            entry = {'kind': kind}
+        stat = os.stat(file_path)
+        entry['source'] = [stat.st_size, stat.st_mtime_ns]
+        offset += -offset % ALIGN
+        entry['offset'] = offset
+        entry['length'] = len(data)
+        index[name] = entry
+        blobs.append((offset, data))
+        offset += len(data)
+
+    index_data = json.dumps(index).encode()
+    start = HEADER.size + len(index_data)
+    start += -start % ALIGN
+    with open(path or pack_path(), 'wb') as file:
+        file.write(HEADER.pack(MAGIC, len(index_data)))
+        file.write(index_data)
+        for offset, data in blobs:
+            file.seek(start + offset)
+            file.write(data)
+    return index
+
+
+# Whether an image from the archive is already in the pixel format
+# convert_alpha() would give it for the current window
+def display_format(image):
+    display = pygame.display.get_surface()
+    return (display is not None and display.get_bitsize() == 32
+            and image.get_masks()[:3] == display.get_masks()[:3])
+
+
+# Read side of the archive. The file is mapped copy-on-write, so surfaces
+# made from it share the mapped pages instead of copying or decoding them.
+class AssetPack():
+    def __init__(self, path=None):
+        self.file = open(path or pack_path(), 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_COPY)
+        magic, index_length = HEADER.unpack_from(self.map)
+        if magic != MAGIC:
+            raise ValueError('not an asset archive: ' + self.file.name)
+        self.index = json.loads(self.map[HEADER.size:HEADER.size + index_length])
+        self.start = HEADER.size + index_length
+        self.start += -self.start % ALIGN
+        self.view = memoryview(self.map)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def fresh(self, name, path):
+        # Whether the entry was packed from the file now at path. Without
+        # the file, as in a packaged build, the archive is all there is.
+        entry = self.index.get(name)
+        if entry is None:
+            return False
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return True
+        return entry.get('source') == [stat.st_size, stat.st_mtime_ns]
+
+    def data(self, name):
+        entry = self.index[name]
+        offset = self.start + entry['offset']
+        return self.view[offset:offset + entry['length']]
+
+    def image(self, name):
+        entry = self.index[name]
+        return pygame.image.frombuffer(self.data(name), tuple(entry['size']), entry['format'])
+
+
+# Open the archive if one has been built, otherwise None so callers fall
+# back to the loose files in assets1/
+def open_pack(path=None):
+    path = path or pack_path()
+    if os.path.exists(path):
+        return AssetPack(path)
+    return None
+
+
+if __name__ == '__main__':
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    index = build()
+    print(f'packed {len(index)} assets into {pack_path()}')
@@ -0,0 +1,139 @@
+import io
+import time
+import threading
+import pygame
+from assetpack import open_pack, display_format
+from audio import load_sound
+
+# Every file in assets1/, in the order the background loader streams them
+MANIFEST = {
+    'bg': ('assets1/bg.png', 'image'),
+    'jumpy': ('assets1/jump.png', 'image'),
+    'jumpy_jump': ('assets1/jimp3.png', 'image'),
+    'platform': ('assets1/wood.png', 'image'),
+    'bird': ('assets1/bird.png', 'image'),
+    'bg2': ('assets1/bg2.png', 'image'),
+    'jump_fx': ('assets1/jump.mp3', 'sound'),
+    'death_fx': ('assets1/death.mp3', 'sound'),
+    'music': ('assets1/music1.mp3', 'music'),
+}
+
+# What the menu needs before it can draw, and what gameplay needs
+MENU_ASSETS = ['bg']
+GAMEPLAY_ASSETS = ['jumpy', 'jumpy_jump', 'platform', 'bird', 'bg2']
+
+
+# Loads the manifest lazily. Required assets are loaded on the calling
+# thread; the rest are decoded on a background thread and marked ready one
+# by one. Images are converted for the display on the main thread the first
+# time they are fetched, since conversion needs the window. If a packed
+# archive has been built, assets come from it instead of the loose files,
+# except for files changed since it was built.
+# An asset that fails to load is still marked ready, and its error is raised
+# by get() and wait() on the thread that asks for it.
+class AssetManager():
+    def __init__(self, manifest=MANIFEST, convert=True, use_pack=True):
+        self.manifest = manifest
+        self.convert = convert
+        self.pack = open_pack() if use_pack else None
+        self.display_ready = set()
+        self.loaded = {}
+        self.converted = {}
+        self.ready = {name: threading.Event() for name in manifest}
+        self.errors = {}
+        self.worker = None
+        self.start_time = time.perf_counter()
+        # Seconds from creation to the first frame on screen, and the budget
+        # load_within() was given for it
+        self.first_frame_time = None
+        self.budget = None
+
+    def decode(self, name):
+        path, kind = self.manifest[name]
+        if self.pack and self.pack.fresh(name, path):
+            if kind == 'image':
+                # Straight from the mapped file, in display format on a
+                # 32-bit BGRA window
+                self.display_ready.add(name)
+                return self.pack.image(name)
+            if kind == 'sound':
+                return load_sound(name, self.pack.data(name))
+            return io.BytesIO(self.pack.data(name))
+        if kind == 'image':
+            return pygame.image.load(path)
+        if kind == 'sound':
+            # Decoded once, then loaded from the PCM cache
+            with open(path, 'rb') as file:
+                return load_sound(name, file.read())
+        # Music is streamed by the mixer, so just read the file off disk
+        with open(path, 'rb') as file:
+            return io.BytesIO(file.read())
+
+    def load(self, name):
+        if not self.ready[name].is_set():
+            try:
+                self.loaded[name] = self.decode(name)
+            except Exception as error:
+                self.errors[name] = error
+            self.ready[name].set()
+
+    def load_within(self, required, budget):
+        # Load what is required, then keep loading in manifest order while
+        # there is time left in the budget (in seconds). The budget is only
+        # checked between assets, so over_budget() tells if it was overrun.
+        self.budget = budget
+        for name in required:
+            self.load(name)
+        for name in self.manifest:
+            if time.perf_counter() - self.start_time >= budget:
+                break
+            self.load(name)
+
+    def start(self):
+        # Stream everything not loaded yet on a background thread
+        self.worker = threading.Thread(target=self.run, daemon=True)
+        self.worker.start()
+
+    def run(self):
+        for name in self.manifest:
+            self.load(name)
+
+    def is_ready(self, name):
+        return self.ready[name].is_set()
+
+    def all_ready(self, names):
+        return all(self.is_ready(name) for name in names)
+
+    def wait(self, names):
+        for name in names:
+            self.wait_for(name)
+
+    def wait_for(self, name):
+        if not self.is_ready(name) and self.worker is None:
+            # Nothing is streaming it, so load it here instead
+            self.load(name)
+        self.ready[name].wait()
+        if name in self.errors:
+            raise self.errors[name]
+
+    def get(self, name, wait=True):
+        # Returns None for an asset still loading when wait is False
+        if name in self.converted:
+            return self.converted[name]
+        if not self.is_ready(name) and not wait:
+            return None
+        self.wait_for(name)
+        asset = self.loaded[name]
+        if (self.convert and self.manifest[name][1] == 'image'
+                and not (name in self.display_ready and display_format(asset))):
+            asset = asset.convert_alpha()
+        self.converted[name] = asset
+        return asset
+
+    def mark_first_frame(self):
+        if self.first_frame_time is None:
+            self.first_frame_time = time.perf_counter() - self.start_time
+
+    def over_budget(self):
+        return (self.first_frame_time is not None and self.budget is not None
+                and self.first_frame_time > self.budget)
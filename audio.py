@@ -0,0 +1,121 @@
+import io
+import os
+import time
+import zlib
+import pygame
+
+# Mixer format. A smaller buffer means the mixer hands sound to the device
+# sooner after play() (256 frames is under 6 ms at 44.1 kHz) at the risk of
+# underruns on slow machines, so it can be raised with UP_AUDIO_BUFFER.
+FREQUENCY = 44100
+SAMPLE_SIZE = -16
+CHANNELS = 2
+BUFFER = 256
+
+# Decoded effects are kept here as raw PCM in the mixer's format, so later
+# launches load them without decoding
+SOUND_CACHE = 'sound_cache'
+
+# Channels kept for each category of sound, so effects only ever take
+# channels from their own pool and never cut off another category's
+CHANNEL_POOLS = {'player': 2, 'events': 1}
+
+# Effects as (category, volume, minimum seconds between plays)
+SOUNDS = {
+    'jump_fx': ('player', 0.5, 0.05),
+    'death_fx': ('events', 0.4, 0.0),
+}
+
+
+def init_mixer(buffer=BUFFER):
+    pygame.mixer.init(FREQUENCY, SAMPLE_SIZE, CHANNELS, buffer)
+
+
+# Decode an encoded sound file (bytes or a buffer) once into PCM, or load the
+# PCM cached by an earlier decode. The cache is keyed by the file's checksum
+# and the mixer format, so an edited file or a different format decodes again.
+def load_sound(name, data, cache=SOUND_CACHE):
+    frequency, size, channels = pygame.mixer.get_init()
+    key = f'{zlib.crc32(data):08x}-{frequency}-{size}-{channels}'
+    path = os.path.join(cache, f'{name}-{key}.pcm')
+    try:
+        with open(path, 'rb') as file:
+            return pygame.mixer.Sound(buffer=file.read())
+    except OSError:
+        pass
+    sound = pygame.mixer.Sound(io.BytesIO(data))
+    try:
+        os.makedirs(cache, exist_ok=True)
+        # Written aside and renamed, so a reader never sees half a file
+        with open(path + '.tmp', 'wb') as file:
+            file.write(sound.get_raw())
+        os.replace(path + '.tmp', path)
+    except OSError:
+        pass
+    return sound
+
+
+# Plays effects on channels reserved per category. A sound played again
+# sooner than its minimum interval is dropped, and when every channel in its
+# pool is busy the one that started longest ago is reused. Effects still
+# streaming in are skipped. set_volume() sets the master volume that scales
+# each effect's own, up to full volume.
+class SoundBank():
+    def __init__(self, assets, sounds=SOUNDS, pools=CHANNEL_POOLS):
+        self.assets = assets
+        self.settings = sounds
+        self.sounds = {}
+        self.volume = 1.0
+        self.last_played = {}
+        self.pools = {}
+        reserved = sum(pools.values())
+        if pygame.mixer.get_num_channels() < reserved:
+            pygame.mixer.set_num_channels(reserved)
+        pygame.mixer.set_reserved(reserved)
+        first = 0
+        for category, count in pools.items():
+            self.pools[category] = [pygame.mixer.Channel(first + i) for i in range(count)]
+            first += count
+        self.started = {}
+        self.played = 0
+        self.limited = 0
+        self.stolen = 0
+
+    def get(self, name):
+        sound = self.sounds.get(name)
+        if sound is None:
+            sound = self.assets.get(name, wait=False)
+            if sound is not None:
+                sound.set_volume(min(1.0, self.settings[name][1] * self.volume))
+                self.sounds[name] = sound
+        return sound
+
+    def set_volume(self, volume):
+        self.volume = volume
+        for name, sound in self.sounds.items():
+            sound.set_volume(min(1.0, self.settings[name][1] * volume))
+
+    def play(self, name):
+        # Returns the channel used, or None if the sound was not played
+        sound = self.get(name)
+        if sound is None:
+            return None
+        category, volume, interval = self.settings[name]
+        now = time.perf_counter()
+        if name in self.last_played and now - self.last_played[name] < interval:
+            self.limited += 1
+            return None
+        self.last_played[name] = now
+        channel = self.free_channel(category)
+        channel.play(sound)
+        self.started[channel] = now
+        self.played += 1
+        return channel
+
+    def free_channel(self, category):
+        pool = self.pools[category]
+        for channel in pool:
+            if not channel.get_busy():
+                return channel
+        self.stolen += 1
+        return min(pool, key=self.started.get)
@@ -0,0 +1,93 @@
+import pygame
+
+# Scroll factors of the layers, back to front
+FAR_FACTOR = 0.5
+NEAR_FACTOR = 1.0
+
+
+# One background image prepared for drawing: tiled across the layer's
+# columns x to x + width, and down far enough that a screen's height can
+# start at any row of the image, all in a single opaque display-format
+# strip. Any scroll position is then one contiguous source rect, and the
+# wrap never needs a second blit.
+class Layer():
+    def __init__(self, image, factor, screen_width, screen_height, x=0, width=None, colorkey=None):
+        self.factor = factor
+        self.x = x
+        self.width = screen_width - x if width is None else width
+        self.opaque = colorkey is None
+        self.tile_height = image.get_height()
+        self.strip = pygame.Surface((self.width, self.tile_height + screen_height)).convert()
+        for tile_y in range(0, self.strip.get_height(), self.tile_height):
+            for tile_x in range(0, self.width, image.get_width()):
+                self.strip.blit(image, (tile_x, tile_y))
+        if colorkey:
+            # Run-length encoded, so see-through areas cost next to nothing
+            self.strip.set_colorkey(colorkey, pygame.RLEACCEL)
+
+    def top(self, scroll):
+        # Row of the strip shown at the top of the screen
+        return -int(scroll * self.factor) % self.tile_height
+
+
+# Parallax background made of layers drawn back to front, each scrolling at
+# its own factor of the world scroll. Only what is on screen is blitted, and
+# only the columns of a layer not hidden behind an opaque layer in front of
+# it, so stacking layers costs no more than the screen area they show.
+class Background():
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.layers = []
+        # How many layers to draw, from the back; None draws them all
+        self.max_layers = None
+        self.spans_key = None
+        self.spans = []
+
+    def add_layer(self, image, factor, x=0, width=None, colorkey=None):
+        self.layers.append(Layer(image, factor, self.width, self.height, x, width, colorkey))
+        self.spans_key = None
+
+    def visible_spans(self):
+        # [(layer, [(x0, x1), ...])] for the layers being drawn, with the
+        # columns covered by opaque layers in front cut out
+        if self.spans_key != (len(self.layers), self.max_layers):
+            layers = self.layers[:self.max_layers]
+            self.spans = []
+            for i, layer in enumerate(layers):
+                spans = [(layer.x, layer.x + layer.width)]
+                for front in layers[i + 1:]:
+                    if front.opaque:
+                        spans = cut(spans, front.x, front.x + front.width)
+                if spans:
+                    self.spans.append((layer, spans))
+            self.spans_key = (len(self.layers), self.max_layers)
+        return self.spans
+
+    def draw(self, surface, scroll):
+        for layer, spans in self.visible_spans():
+            top = layer.top(scroll)
+            for x0, x1 in spans:
+                surface.blit(layer.strip, (x0, 0), (x0 - layer.x, top, x1 - x0, self.height))
+
+    def draw_rects(self, surface, scroll, rects):
+        # Repaint just the given screen regions
+        for layer, spans in self.visible_spans():
+            top = layer.top(scroll)
+            for x0, x1 in spans:
+                column = pygame.Rect(x0, 0, x1 - x0, self.height)
+                for rect in rects:
+                    rect = rect.clip(column)
+                    if rect:
+                        surface.blit(layer.strip, rect.topleft, (rect.x - layer.x, top + rect.y, rect.width, rect.height))
+
+
+# Remove the columns x0 to x1 from a list of spans
+def cut(spans, x0, x1):
+    result = []
+    for start, end in spans:
+        if start < x0:
+            result.append((start, min(end, x0)))
+        if end > x1:
+            result.append((max(start, x1), end))
+    return result
@@ -0,0 +1,64 @@
+# Benchmark of the player's platform collision step against platform count.
+# Compares the sorted PlatformGroup index with a plain linear scan.
+#
+#   python benchmarks/collision.py [count ...]
+import os
+import sys
+import random
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import pygame
+from platformgroup import PlatformGroup
+from posecache import PoseCache
+from simulation import (Player, Platform, load_assets, SCREEN_WIDTH, SCREEN_HEIGHT,
+                        S_SCREEN_WIDTH, E_SCREEN_WIDTH)
+
+COUNTS = [10, 100, 1000, 5000]
+MOVES = 2000
+
+
+# Reference implementation: every platform is a candidate
+class LinearGroup(pygame.sprite.Group):
+    def in_range(self, top, bottom):
+        return self.sprites()
+
+
+def fill(group, count, assets, rng):
+    for i in range(count):
+        width = rng.randint(60, 100)
+        x = rng.randint(S_SCREEN_WIDTH, E_SCREEN_WIDTH - width)
+        y = rng.randint(-SCREEN_HEIGHT, SCREEN_HEIGHT)
+        group.add(Platform(x, y, width, False, assets['platform'], rng))
+
+
+def time_moves(group, poses):
+    player = Player(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2, poses)
+    start = time.perf_counter()
+    for i in range(MOVES):
+        player.rect.center = (SCREEN_WIDTH // 2, (i * 7) % SCREEN_HEIGHT)
+        player.vel_y = 5
+        player.move(0, group)
+    return (time.perf_counter() - start) / MOVES * 1e6
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or COUNTS
+    assets = load_assets()
+    poses = PoseCache({'idle': assets['jumpy'], 'jump': assets['jumpy_jump']}, (60, 60))
+    print(f"{'platforms':>10} {'linear us':>12} {'indexed us':>12} {'speedup':>8}")
+    for count in counts:
+        linear = LinearGroup()
+        indexed = PlatformGroup()
+        fill(linear, count, assets, random.Random(count))
+        fill(indexed, count, assets, random.Random(count))
+        linear_us = time_moves(linear, poses)
+        indexed_us = time_moves(indexed, poses)
+        print(f"{count:>10} {linear_us:>12.2f} {indexed_us:>12.2f} {linear_us / indexed_us:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+# Benchmark of drawing the playfield against platform count, comparing a
+# blit per entity with one batched Canvas.blits call, and the memory the
+# platform textures take when each platform has its own scaled copy versus
+# one shared texture per width.
+#
+#   python benchmarks/drawing.py [count ...]
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+from simulation import Simulation, load_assets
+from rendertarget import Canvas
+
+COUNTS = [10, 100, 1000]
+FRAMES = 300
+
+
+def texture_bytes(images):
+    return sum(image.get_width() * image.get_height() * image.get_bytesize() for image in images)
+
+
+def ms_per_frame(draw, canvas, blits):
+    start = time.perf_counter()
+    for i in range(FRAMES):
+        draw(canvas, blits)
+    return (time.perf_counter() - start) * 1000 / FRAMES
+
+
+def per_blit(canvas, blits):
+    return [canvas.blit(image, pos) for image, pos in blits]
+
+
+def batched(canvas, blits):
+    return canvas.blits(blits)
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or COUNTS
+    pygame.display.set_mode((1, 1))
+    assets = load_assets()
+    surface = pygame.Surface((1260, 720)).convert()
+    print(f"{'platforms':>10} {'textures':>9} {'copies KB':>10} {'shared KB':>10} "
+          f"{'per blit ms':>12} {'batched ms':>11} {'speedup':>8}")
+    for count in counts:
+        # Tight gaps keep the whole stack of platforms close to the screen
+        sim = Simulation(assets, seed=count, max_platforms=count, platform_gap=(1, 3))
+        while len(sim.platform_group) < count:
+            sim.generate_platform()
+        platforms = sim.platform_group.sprites()
+        shared = {id(platform.image): platform.image for platform in platforms}
+        blits = sim.blit_list(0.5)
+        for name, view, scale in (('native', (0, 0, 1260, 720), 1), ('half', (0, 0, 1260, 720), 0.5)):
+            canvas = Canvas(surface, view, scale)
+            single = ms_per_frame(per_blit, canvas, blits)
+            batch = ms_per_frame(batched, canvas, blits)
+            print(f"{count:>10} {len(shared):>9} {texture_bytes(p.image for p in platforms) / 1024:>10.0f} "
+                  f"{texture_bytes(shared.values()) / 1024:>10.0f} {single:>12.3f} {batch:>11.3f} "
+                  f"{single / batch:>7.2f}x  {name}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+# Benchmark of whole simulation ticks against entity count, comparing the
+# sprite-based Simulation with the NumPy-backed ArraySimulation.
+#
+#   python benchmarks/entities.py [count ...]
+import os
+import sys
+import random
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from simulation import Simulation, load_assets
+from entitystore import ArraySimulation
+
+COUNTS = [10, 100, 1000, 5000]
+TICKS = 1000
+
+
+def fill(sim, count):
+    while len(sim.platform_group) < count:
+        sim.generate_platform()
+
+
+# Ticks per second with count platforms alive, and the fewest alive seen
+# during a timed tick. Platforms that scroll off are replaced, and a fallen
+# player starts over, between ticks and outside the timing.
+def ticks_per_second(cls, assets, count):
+    # Tight gaps keep the whole stack of platforms close to the screen
+    sim = cls(assets, seed=count, max_platforms=count, platform_gap=(1, 3))
+    rng = random.Random(count)
+    fill(sim, count)
+    elapsed = 0.0
+    fewest = count
+    for i in range(TICKS):
+        fewest = min(fewest, len(sim.platform_group))
+        inputs = rng.randint(0, 3)
+        start = time.perf_counter()
+        sim.step(inputs)
+        sim.blit_list(0.5)
+        elapsed += time.perf_counter() - start
+        if sim.game_over:
+            sim.reset()
+        fill(sim, count)
+    return TICKS / elapsed, fewest
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or COUNTS
+    assets = load_assets()
+    print(f"{'platforms':>10} {'fewest':>7} {'sprites t/s':>12} {'arrays t/s':>12} {'speedup':>8}")
+    for count in counts:
+        sprites, fewest = ticks_per_second(Simulation, assets, count)
+        arrays, fewest_arrays = ticks_per_second(ArraySimulation, assets, count)
+        print(f"{count:>10} {min(fewest, fewest_arrays):>7} {sprites:>12.0f} {arrays:>12.0f} {arrays / sprites:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+# Benchmark of the player-hazard check against hazard count. Compares
+# CollisionSystem, rebuilt for every check as it is every tick in the game,
+# with the old two-pass spritecollide (rects, then masks).
+#
+#   python benchmarks/hazards.py [count ...]
+import os
+import sys
+import random
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import pygame
+from collisions import CollisionSystem
+from enemy import Enemy
+from posecache import PoseCache
+from simulation import (Player, load_assets, SCREEN_WIDTH, SCREEN_HEIGHT, S_SCREEN_WIDTH,
+                        E_SCREEN_WIDTH)
+
+COUNTS = [1, 10, 100]
+CHECKS = 5000
+
+
+def fill(group, count, assets, rng):
+    for i in range(count):
+        enemy = Enemy(SCREEN_WIDTH, 0, assets['bird_sheet'], rng)
+        enemy.rect.x = rng.randint(S_SCREEN_WIDTH - 60, E_SCREEN_WIDTH)
+        enemy.rect.y = rng.randint(0, SCREEN_HEIGHT - 60)
+        group.add(enemy)
+
+
+def spritecollide_contacts(player, group):
+    if pygame.sprite.spritecollide(player, group, False):
+        return pygame.sprite.spritecollide(player, group, False, pygame.sprite.collide_mask)
+    return []
+
+
+def time_checks(check, player, group, rng):
+    positions = [(rng.randint(S_SCREEN_WIDTH, E_SCREEN_WIDTH - 60), rng.randint(0, SCREEN_HEIGHT - 60))
+                 for i in range(CHECKS)]
+    contacts = 0
+    start = time.perf_counter()
+    for position in positions:
+        player.rect.topleft = position
+        contacts += len(check(player, group))
+    return (time.perf_counter() - start) / CHECKS * 1e6, contacts
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or COUNTS
+    assets = load_assets()
+    poses = PoseCache({'idle': assets['jumpy'], 'jump': assets['jumpy_jump']}, (60, 60))
+    collisions = CollisionSystem()
+    print(f"{'hazards':>8} {'spritecollide us':>17} {'system us':>10} {'speedup':>8}")
+    for count in counts:
+        group = pygame.sprite.Group()
+        fill(group, count, assets, random.Random(count))
+        player = Player(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2, poses)
+        old, old_contacts = time_checks(spritecollide_contacts, player, group, random.Random(1))
+        new, new_contacts = time_checks(collisions.hazard_contacts, player, group, random.Random(1))
+        # Both have to find the same contacts for the timing to mean anything
+        assert old_contacts == new_contacts
+        print(f"{count:>8} {old:>17.2f} {new:>10.2f} {old / new:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
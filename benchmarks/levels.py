@@ -0,0 +1,69 @@
+# Benchmark of simulation ticks under each way of generating the level:
+# inline, one platform per tick; chunks built on the tick that needs them;
+# chunks built ahead on the generator thread; and chunks pregenerated before
+# the run, so no generation is timed at all. Chunked runs all play the same
+# level, so their scores match.
+#
+#   python benchmarks/levels.py [ticks]
+import os
+import sys
+import time
+import functools
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from simulation import Simulation, load_assets
+from level import LevelGenerator, PregeneratedLevel, pregenerate
+from scenarios import climb_input
+
+SEED = 1
+TICKS = 20000
+# Chunks built for each pregenerated run, enough for any run TICKS long
+CHUNKS = 100
+
+
+def pregenerated(seed, platform_gap):
+    return PregeneratedLevel(pregenerate(seed, CHUNKS, platform_gap))
+
+
+LEVELS = {
+    'inline': None,
+    'on tick': functools.partial(LevelGenerator, threaded=False),
+    'threaded': LevelGenerator,
+    'pregenerated': pregenerated,
+}
+
+
+# Per-tick times in seconds and the total score. A fallen climber starts
+# over outside the timing, which is also where a pregenerated level is built.
+def run(assets, level, ticks):
+    sim = Simulation(assets, seed=SEED, level=level)
+    times = []
+    score = 0
+    for i in range(ticks):
+        inputs = climb_input(sim)
+        start = time.perf_counter()
+        sim.step(inputs)
+        times.append(time.perf_counter() - start)
+        if sim.game_over:
+            score += sim.score
+            sim.reset(SEED + i)
+    sim.close()
+    return times, score + sim.score
+
+
+def main():
+    ticks = int(sys.argv[1]) if len(sys.argv) > 1 else TICKS
+    assets = load_assets()
+    print(f"{'level':>13} {'mean us':>8} {'p99 us':>8} {'max us':>8} {'score':>8}")
+    for name, level in LEVELS.items():
+        times, score = run(assets, level, ticks)
+        times.sort()
+        mean = sum(times) / len(times) * 1e6
+        print(f"{name:>13} {mean:>8.1f} {times[len(times) * 99 // 100] * 1e6:>8.1f} {times[-1] * 1e6:>8.1f} {score:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+# Round-trip check of replay files: runs are played live with a recorder
+# attached, the way up.py records them, saved, loaded back and re-run with
+# replay.run_headless, which must end on the same score after the same
+# number of ticks. Runs are checked uncapped and with a platform cap.
+# Exits with status 1 on any difference.
+#
+#   python benchmarks/replays.py [seed ...]
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import replay
+from simulation import Simulation, load_assets
+from level import LevelGenerator
+from scenarios import climb_input
+
+SEEDS = [1, 2, 3]
+CAPS = [None, 6]
+MAX_TICKS = 20000
+
+
+def play(assets, seed, cap, path):
+    sim = Simulation(assets, seed=seed, max_platforms=cap, level=LevelGenerator)
+    sim.recorder = replay.InputRecorder(seed, chunked=True, max_platforms=cap)
+    while not sim.game_over and sim.ticks < MAX_TICKS:
+        sim.step(climb_input(sim))
+    sim.recorder.save(path)
+    sim.close()
+    return sim.score, sim.ticks
+
+
+def main():
+    seeds = [int(arg) for arg in sys.argv[1:]] or SEEDS
+    assets = load_assets()
+    failed = False
+    print(f"{'seed':>6} {'cap':>5} {'live score':>11} {'ticks':>6} {'replay score':>13} {'ticks':>6}  result")
+    with tempfile.TemporaryDirectory() as scratch:
+        for seed in seeds:
+            for cap in CAPS:
+                path = os.path.join(scratch, f'{seed}-{cap}.upr')
+                score, ticks = play(assets, seed, cap, path)
+                result = replay.run_headless(replay.load(path), assets)
+                match = (result['score'], result['ticks']) == (score, ticks)
+                failed = failed or not match
+                print(f"{seed:>6} {str(cap):>5} {score:>11} {ticks:>6} {result['score']:>13} {result['ticks']:>6}  "
+                      f"{'match' if match else 'differs'}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,397 @@
+# Scenario benchmarks of the whole game. Each scenario runs up.py in its own
+# process under the SDL dummy video and audio drivers, so it needs no display
+# or sound card. Scripted input takes the game to a fixed situation, then the
+# frame time, allocations and peak RSS are measured over a number of frames.
+#
+#   python benchmarks/scenarios.py [scenario ...] [--frames N] [--output FILE]
+#                                  [--baseline FILE] [--threshold FRACTION]
+#
+# With --baseline the results are compared against an earlier --output file,
+# and the exit status is 1 if any metric got worse by more than the threshold.
+import os
+import sys
+import gc
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# What each scenario does once the game is up: whether to start a run, the
+# score to fast-forward to (and whether a bird has to be on screen), whether
+# to pause on top of it, and whether to pack the screen with platforms
+SCENARIOS = {
+    'menu_idle': {},
+    'paused_overlay': {'play': True, 'pause': True},
+    'early_climb': {'play': True},
+    'moving_platforms': {'play': True, 'score': 500},
+    'birds': {'play': True, 'score': 1700, 'enemies': True},
+    'dense_platforms': {'play': True, 'dense': True},
+}
+
+SEED = 1
+FRAMES = 600
+WARMUP_FRAMES = 60
+FPS = 60
+# Platforms and gap range for the dense scenario
+DENSE_PLATFORMS = 60
+DENSE_GAP = (10, 20)
+# Give up on a seed after this many ticks without reaching the starting
+# point, and give up altogether after this many seeds
+MAX_FORWARD_TICKS = 20000
+MAX_SEEDS = 200
+# Seconds a scenario process may run before it is killed
+TIMEOUT = 600
+
+# Metrics compared against a baseline, all worse when higher. p99 and max
+# are reported but too noisy to gate on.
+COMPARED = ['p50_ms', 'p95_ms', 'alloc_kb_per_frame', 'peak_rss_kb']
+THRESHOLD = 0.2
+
+
+# Steers towards the nearest platform worth landing on: the next one below
+# while falling, or the next one well above while still rising
+def climb_input(sim):
+    from simulation import INPUT_LEFT, INPUT_RIGHT
+    player = sim.player
+    best = None
+    for platform in sim.platform_group:
+        rect = platform.rect
+        if player.vel_y > 0:
+            gap = rect.top - player.rect.bottom
+            if gap < -5:
+                continue
+        else:
+            gap = player.rect.bottom - rect.top
+            if gap <= 40:
+                continue
+        if best is None or gap < best[0]:
+            best = (gap, rect.centerx)
+    if best is None:
+        return 0
+    if best[1] < player.rect.centerx - 6:
+        return INPUT_LEFT
+    if best[1] > player.rect.centerx + 6:
+        return INPUT_RIGHT
+    return 0
+
+
+# Runs headless ticks from the start of a run until the scenario's starting
+# point, returning False if the climber falls first
+def reach(sim, score, enemies):
+    for i in range(MAX_FORWARD_TICKS):
+        if sim.score >= score and (sim.enemy_group or not enemies):
+            return True
+        sim.step(climb_input(sim))
+        if sim.game_over:
+            return False
+    return False
+
+
+def survives(sim, ticks):
+    for i in range(ticks):
+        sim.step(climb_input(sim))
+        if sim.game_over:
+            return False
+    return True
+
+
+# Finds the first seed where the climber reaches the starting point and
+# then lives through the measured frames, and leaves sim at that point.
+# restart(seed) starts a fresh run.
+def fast_forward(sim, restart, score=0, enemies=False, horizon=0):
+    for seed in range(SEED, SEED + MAX_SEEDS):
+        restart(seed)
+        if reach(sim, score, enemies) and survives(sim, horizon):
+            restart(seed)
+            reach(sim, score, enemies)
+            return seed
+    raise RuntimeError(f'no seed reaches a score of {score} and survives {horizon} ticks')
+
+
+# Stands in for the event queue, mouse and frame clock while up.py runs.
+# Keys are held and released with KEYDOWN and KEYUP events, as the game
+# reads them. Every call to Clock.tick() marks a frame boundary, which is
+# where the frame times and allocations are sampled. Neither the clock nor
+# pygame.time.wait sleeps, so a frame takes exactly as long as the game's
+# own work.
+class Driver():
+    def __init__(self, scenario, frames):
+        self.scenario = scenario
+        self.frames = frames
+        self.game = None
+        self.frame = 0
+        self.ready = not scenario.get('play')
+        self.start = None
+        self.mouse = (0, 0)
+        self.pressed = set()
+        self.last = None
+        self.times = []
+        self.allocations = []
+        self.gc_start = 0
+        self.gc_collections = 0
+        self.frame_current = 0
+        self.peak_rss_kb = 0
+        self.seed = None
+
+    def install(self, pygame):
+        driver = self
+        self.pygame = pygame
+        self.get_events = pygame.event.get
+
+        class Clock():
+            def tick(self, framerate=0):
+                driver.tick()
+                return 1000 / FPS
+            tick_busy_loop = tick
+
+            def get_fps(self):
+                return FPS
+
+        pygame.time.Clock = Clock
+        pygame.time.wait = lambda milliseconds: 0
+        pygame.event.get = self.events
+        pygame.mouse.get_pos = lambda: self.mouse
+
+    def tick(self):
+        # The first window of frames is timed, the second one traced
+        now = time.perf_counter()
+        if self.start is not None:
+            ended = self.frame - self.start
+            if 0 <= ended < self.frames:
+                self.times.append(now - self.last)
+            elif self.frames <= ended < self.frames * 2:
+                current, peak = tracemalloc.get_traced_memory()
+                self.allocations.append(peak - self.frame_current)
+        self.frame += 1
+        if self.start is not None:
+            begins = self.frame - self.start
+            if begins == 0:
+                self.gc_start = gc_collections()
+            elif begins == self.frames:
+                # Take RSS before tracing adds its own overhead
+                self.gc_collections = gc_collections() - self.gc_start
+                self.peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                tracemalloc.start()
+            if self.frames <= begins < self.frames * 2:
+                tracemalloc.reset_peak()
+                self.frame_current = tracemalloc.get_traced_memory()[0]
+        self.last = time.perf_counter()
+
+    def events(self, *args, **kwargs):
+        pygame = self.pygame
+        self.get_events(*args, **kwargs)
+        game = self.game
+        pressed = set()
+        events = []
+        scenario = self.scenario
+
+        if not self.ready:
+            if game['game_state'] == 'menu' and not game['menu'].game_paused:
+                # Click Play
+                self.mouse = game['menu'].play_button.rect.center
+                events.append(pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1, pos=self.mouse))
+            elif game['game_state'] == 'playing':
+                self.mouse = (0, 0)
+                self.prepare(game)
+                if scenario.get('pause'):
+                    events.append(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_ESCAPE))
+                self.ready = True
+        elif self.start is None:
+            self.start = self.frame + WARMUP_FRAMES
+
+        # Keep climbing while the run is live
+        if game['game_state'] == 'playing' and not game['sim'].game_over:
+            inputs = climb_input(game['sim'])
+            if inputs & 1:
+                pressed.add(pygame.K_LEFT)
+            if inputs & 2:
+                pressed.add(pygame.K_RIGHT)
+        if pressed != self.pressed:
+            for key in pressed - self.pressed:
+                events.append(pygame.event.Event(pygame.KEYDOWN, key=key))
+            for key in self.pressed - pressed:
+                events.append(pygame.event.Event(pygame.KEYUP, key=key))
+            self.pressed = pressed
+
+        if self.start is not None and self.frame >= self.start + self.frames * 2:
+            # Tracing is left on to the end: stopping it while the mixer's
+            # thread is reading the music file through Python can crash
+            events.append(pygame.event.Event(pygame.QUIT))
+        return events
+
+    def prepare(self, game):
+        sim = game['sim']
+        scenario = self.scenario
+        dense = scenario.get('dense')
+        if dense:
+            # Inline generation with a tight gap fills the screen with platforms
+            sim.level_factory = None
+            sim.max_platforms = DENSE_PLATFORMS
+            sim.platform_gap = DENSE_GAP
+
+        def restart(seed):
+            sim.reset(seed)
+            while dense and len(sim.platform_group) < DENSE_PLATFORMS:
+                sim.generate_platform()
+
+        # Nothing moves while paused, so the run only has to last the warmup
+        horizon = WARMUP_FRAMES if scenario.get('pause') else WARMUP_FRAMES + self.frames * 2
+        self.seed = fast_forward(sim, restart, scenario.get('score', 0), scenario.get('enemies', False), horizon)
+        game['stepper'].reset()
+        game['dirty'].invalidate()
+
+    def results(self):
+        times = sorted(self.times) or [0.0]
+        allocations = self.allocations or [0]
+        sim = self.game['sim']
+        # Input-to-photon latency of the driver's key presses and clicks
+        latency = self.game['controls'].latency() or (0.0, 0.0)
+        return {
+            'frames': len(self.times),
+            'mean_ms': sum(times) / len(times) * 1000,
+            'p50_ms': percentile(times, 50) * 1000,
+            'p95_ms': percentile(times, 95) * 1000,
+            'p99_ms': percentile(times, 99) * 1000,
+            'max_ms': times[-1] * 1000,
+            'gc_collections': self.gc_collections,
+            'alloc_kb_per_frame': sum(allocations) / len(allocations) / 1024,
+            'alloc_kb_max': max(allocations) / 1024,
+            'peak_rss_kb': self.peak_rss_kb,
+            'input_p50_ms': latency[0],
+            'input_p99_ms': latency[1],
+            # Time to the menu's first frame and the budget it had
+            'first_frame_ms': (self.game['assets'].first_frame_time or 0.0) * 1000,
+            'first_frame_budget_ms': self.game['FIRST_FRAME_BUDGET'] * 1000,
+            'seed': self.seed,
+            'score': sim.score if sim else 0,
+            'game_over': bool(sim and sim.game_over),
+        }
+
+
+def gc_collections():
+    return sum(stat['collections'] for stat in gc.get_stats())
+
+
+def percentile(values, percent):
+    index = min(len(values) - 1, int(len(values) * percent / 100))
+    return values[index]
+
+
+# Child process: run the game in a scratch directory, so the score file and
+# replay it writes never touch the real ones, and print the results as JSON.
+# The game runs with its default settings: the driver clicks and points in
+# world coordinates, which only match the window with the default view.
+def run_scenario(name, frames):
+    for key in [key for key in os.environ if key.startswith('UP_')]:
+        del os.environ[key]
+    os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    os.environ['SDL_AUDIODRIVER'] = 'dummy'
+    os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
+    scratch = tempfile.mkdtemp(prefix='up-bench-')
+    try:
+        os.symlink(os.path.join(ROOT, 'assets1'), os.path.join(scratch, 'assets1'))
+        os.chdir(scratch)
+        random.seed(SEED)
+
+        import pygame
+        driver = Driver(SCENARIOS[name], frames)
+        driver.install(pygame)
+        path = os.path.join(ROOT, 'up.py')
+        with open(path) as file:
+            code = compile(file.read(), path, 'exec')
+        driver.game = {'__name__': '__main__', '__file__': path}
+        exec(code, driver.game)
+        return driver.results()
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def run_all(names, frames):
+    results = {}
+    for name in names:
+        command = [sys.executable, os.path.abspath(__file__), '--child', name, '--frames', str(frames)]
+        try:
+            output = subprocess.run(command, capture_output=True, text=True, cwd=ROOT, timeout=TIMEOUT)
+        except subprocess.TimeoutExpired:
+            raise RuntimeError(f'scenario {name} did not finish within {TIMEOUT} s')
+        if output.returncode != 0:
+            sys.stderr.write(output.stderr)
+            raise RuntimeError(f'scenario {name} failed')
+        results[name] = json.loads(output.stdout.strip().splitlines()[-1])
+        print_result(name, results[name])
+    return results
+
+
+def print_result(name, result):
+    print(f"{name:<18} p50 {result['p50_ms']:7.3f} ms  p99 {result['p99_ms']:7.3f} ms  "
+          f"alloc {result['alloc_kb_per_frame']:8.1f} KB/frame  rss {result['peak_rss_kb'] / 1024:6.1f} MB  "
+          f"first frame {result['first_frame_ms']:6.1f} ms")
+    if result['first_frame_ms'] > result['first_frame_budget_ms']:
+        print(f"{'':<18} first frame over its {result['first_frame_budget_ms']:.0f} ms budget")
+
+
+# Returns a line for every metric more than threshold worse than the baseline
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for metric in COMPARED:
+            old = baseline[name][metric]
+            new = result[metric]
+            if old > 0 and new > old * (1 + threshold):
+                regressions.append(f'{name} {metric}: {old:.3f} -> {new:.3f} (+{(new / old - 1) * 100:.0f}%)')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Scenario benchmarks of the whole game')
+    parser.add_argument('scenarios', nargs='*', help='scenarios to run, all by default: ' + ', '.join(SCENARIOS))
+    parser.add_argument('--frames', type=int, default=FRAMES, help='frames to measure per scenario')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='compare against results from an earlier --output')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD, help='allowed slowdown as a fraction')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_scenario(args.child, args.frames)))
+        return 0
+
+    for name in args.scenarios:
+        if name not in SCENARIOS:
+            parser.error(f'unknown scenario {name}')
+    results = run_all(args.scenarios or list(SCENARIOS), args.frames)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'frames': args.frames,
+                'scenarios': results,
+            }, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)['scenarios']
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print('REGRESSION ' + line)
+        if regressions:
+            return 1
+        print(f'no regressions beyond {args.threshold * 100:.0f}%')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
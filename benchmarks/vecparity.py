@@ -0,0 +1,86 @@
+# Parity check of the vectorized environment: for fixed seeds and a fixed
+# stream of random actions, VectorEnv with one process and with several must
+# produce exactly the observations, rewards, done flags and final scores of
+# standalone Simulations set up the way up.py sets them up. Exits with
+# status 1 on the first difference.
+#
+#   python benchmarks/vecparity.py [envs] [workers] [ticks]
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import numpy as np
+from simulation import Simulation, load_assets
+from level import LevelGenerator
+from vecenv import VectorEnv, ACTIONS, OBS_SIZE, observe
+
+SEEDS = [0, 1000]
+ENVS = 6
+WORKERS = 3
+TICKS = 3000
+
+
+# The same instances stepped one by one as independent games
+def standalone(assets, num_envs, seed, actions):
+    sims = [Simulation(assets, seed=seed + i, level=LevelGenerator) for i in range(num_envs)]
+    episodes = [0] * num_envs
+    obs = np.zeros((num_envs, OBS_SIZE), dtype=np.float32)
+    for tick_actions in actions:
+        rewards = np.zeros(num_envs, dtype=np.float32)
+        dones = np.zeros(num_envs, dtype=bool)
+        final_scores = np.zeros(num_envs, dtype=np.int64)
+        for i, sim in enumerate(sims):
+            score = sim.score
+            sim.step(int(tick_actions[i]))
+            rewards[i] = sim.score - score
+            dones[i] = sim.game_over
+            if sim.game_over:
+                final_scores[i] = sim.score
+                episodes[i] += 1
+                sim.reset(seed + i + episodes[i] * num_envs)
+            observe(sim, obs[i])
+        yield obs.copy(), rewards, dones, final_scores
+    for sim in sims:
+        sim.close()
+
+
+def vectorized(num_envs, seed, workers, actions):
+    env = VectorEnv(num_envs, seed=seed, workers=workers)
+    env.reset()
+    try:
+        for tick_actions in actions:
+            yield env.step(tick_actions)
+    finally:
+        env.close()
+
+
+# Returns the first tick where the two runs differ, or None
+def first_difference(expected, actual):
+    for tick, (a, b) in enumerate(zip(expected, actual)):
+        if not all(np.array_equal(x, y) for x, y in zip(a, b)):
+            return tick
+    return None
+
+
+def main():
+    num_envs, workers, ticks = [int(arg) for arg in sys.argv[1:4]] + [ENVS, WORKERS, TICKS][len(sys.argv[1:4]):]
+    assets = load_assets()
+    failed = False
+    print(f"{'seed':>6} {'workers':>8} {'ticks':>6} {'episodes':>9}  result")
+    for seed in SEEDS:
+        actions = np.random.default_rng(seed).choice(ACTIONS, (ticks, num_envs))
+        expected = list(standalone(assets, num_envs, seed, actions))
+        episodes = int(sum(step[2].sum() for step in expected))
+        for count in sorted({1, workers}):
+            tick = first_difference(expected, vectorized(num_envs, seed, count, actions))
+            result = 'match' if tick is None else f'differs at tick {tick}'
+            failed = failed or tick is not None
+            print(f"{seed:>6} {count:>8} {ticks:>6} {episodes:>9}  {result}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
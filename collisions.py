@@ -0,0 +1,48 @@
+# Player collisions for one simulation: contacts with hazards (birds, or
+# anything else with a rect and a mask) and landings on platforms.
+#
+# Hazards are gathered once per tick into a flat list of their rects, and
+# every contact with the player comes back from one query: a single
+# Rect.collidelistall() call for the broadphase, then the masks cached with
+# each sprite's current frame, so no mask is built during a check.
+class CollisionSystem():
+    def __init__(self):
+        self.hazards = []
+        self.rects = []
+
+    def build(self, *groups):
+        self.hazards = [sprite for group in groups for sprite in group]
+        self.rects = [sprite.rect for sprite in self.hazards]
+
+    def contacts(self, sprite):
+        # Hazards from the last build() whose masks overlap the sprite's
+        rect = sprite.rect
+        mask = sprite.mask
+        found = []
+        for i in rect.collidelistall(self.rects):
+            hazard = self.hazards[i]
+            if mask.overlap(hazard.mask, (hazard.rect.x - rect.x, hazard.rect.y - rect.y)):
+                found.append(hazard)
+        return found
+
+    def hazard_contacts(self, sprite, *groups):
+        self.build(*groups)
+        return self.contacts(sprite)
+
+
+# Resolve a player falling onto a platform during a move of dy. Candidates
+# come from the platform group's range index over rect.top. Returns the
+# vertical move left after any landing.
+def land(player, platform_group, dy):
+    rect = player.rect
+    for platform in platform_group.in_range(int(rect.y + dy) - 1, int(rect.y + dy) + player.height + 1):
+        # Collision in the y direction
+        if platform.rect.colliderect(rect.x, rect.y + dy, player.width, player.height):
+            # Check if above the platform
+            if rect.bottom < platform.rect.centery:
+                if player.vel_y > 0:
+                    rect.bottom = platform.rect.top
+                    dy = 0
+                    player.vel_y = -20
+                    player.bounced = True
+    return dy
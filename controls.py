@@ -0,0 +1,134 @@
+import time
+import pygame
+from simulation import INPUT_LEFT, INPUT_RIGHT
+
+# Default bindings of keys to commands; InputSystem.bind() remaps them
+BINDINGS = {
+    'left': [pygame.K_a, pygame.K_LEFT],
+    'right': [pygame.K_d, pygame.K_RIGHT],
+    'confirm': [pygame.K_SPACE],
+    'back': [pygame.K_ESCAPE],
+    'profile': [pygame.K_F3],
+    'trace': [pygame.K_F4],
+}
+
+# Commands that steer the player, and the simulation input bit of each
+MOVES = {'left': INPUT_LEFT, 'right': INPUT_RIGHT}
+
+
+# One input as a command: a bound key going down or up, a click ('click',
+# mouse button 1, with its position in the world) or 'quit'. time is when
+# the event was taken off the queue.
+class Command():
+    __slots__ = ('name', 'down', 'time', 'pos')
+
+    def __init__(self, name, down, time, pos=None):
+        self.name = name
+        self.down = down
+        self.time = time
+        self.pos = pos
+
+
+# The one place input is read. poll() drains the pygame event queue once a
+# frame into a buffer of timestamped commands, which the player, the menu
+# and the state machine all read from; nothing else polls the keyboard or
+# mouse. Held moves are tracked from key events, and a move pressed and
+# released between two ticks still counts until handled() says a tick has
+# used it.
+#
+# Input-to-photon latency is measured from the drain before the one that
+# delivered a press, the earliest it can have been queued (pygame does not
+# expose event times), to the present of the first frame that shows its
+# effect: handled() marks the buffer as shown and presented() takes the
+# samples.
+class InputSystem():
+    def __init__(self, bindings=None, to_world=None, samples=240):
+        self.keys = {}
+        for name, keys in (bindings or BINDINGS).items():
+            self.bind(name, *keys)
+        self.to_world = to_world or (lambda pos: pos)
+        self.commands = []
+        self.held = set()
+        self.tapped = set()
+        self.moves = set()
+        self.pointer = self.to_world(pygame.mouse.get_pos())
+        self.drained = self.previous = time.perf_counter()
+        self.waiting = []
+        self.shown = []
+        self.samples = [0.0] * samples
+        self.sample_count = 0
+
+    def bind(self, name, *keys):
+        # Replace the keys bound to a command
+        for key in [key for key, bound in self.keys.items() if bound == name]:
+            del self.keys[key]
+        for key in keys:
+            self.keys[key] = name
+
+    def poll(self):
+        self.previous = self.drained
+        now = self.drained = time.perf_counter()
+        self.commands = []
+        self.tapped.clear()
+        for event in pygame.event.get():
+            if event.type == pygame.KEYDOWN or event.type == pygame.KEYUP:
+                name = self.keys.get(event.key)
+                if name is None:
+                    continue
+                if event.type == pygame.KEYDOWN:
+                    self.held.add(name)
+                else:
+                    self.held.discard(name)
+                self.commands.append(Command(name, event.type == pygame.KEYDOWN, now))
+            elif event.type == pygame.MOUSEBUTTONDOWN or event.type == pygame.MOUSEBUTTONUP:
+                self.pointer = self.to_world(event.pos)
+                if event.button == 1:
+                    self.commands.append(Command('click', event.type == pygame.MOUSEBUTTONDOWN, now, self.pointer))
+            elif event.type == pygame.MOUSEMOTION:
+                self.pointer = self.to_world(event.pos)
+            elif event.type == pygame.QUIT:
+                self.commands.append(Command('quit', True, now))
+        for command in self.commands:
+            if command.down:
+                self.tapped.add(command.name)
+                if command.name in MOVES:
+                    self.moves.add(command.name)
+                # The earliest the event can have been queued
+                self.waiting.append(self.previous)
+        return self.commands
+
+    def pressed(self, name):
+        # Whether the command went down this frame, once per press
+        return name in self.tapped
+
+    def inputs(self):
+        # Simulation input bits for this frame
+        bits = 0
+        for name, bit in MOVES.items():
+            if name in self.held or name in self.moves:
+                bits |= bit
+        return bits
+
+    def handled(self):
+        # The frame being drawn shows the effect of every command so far
+        self.moves.clear()
+        if self.waiting:
+            self.shown.extend(self.waiting)
+            self.waiting.clear()
+
+    def presented(self):
+        if not self.shown:
+            return
+        now = time.perf_counter()
+        for queued in self.shown:
+            self.samples[self.sample_count % len(self.samples)] = now - queued
+            self.sample_count += 1
+        self.shown.clear()
+
+    def latency(self):
+        # (p50, p99) input-to-photon latency in ms over the recent presses
+        count = min(self.sample_count, len(self.samples))
+        if not count:
+            return None
+        samples = sorted(self.samples[:count])
+        return (samples[count // 2] * 1000, samples[min(count - 1, count * 99 // 100)] * 1000)
@@ -0,0 +1,47 @@
+import pygame
+
+# Tracks the screen regions that changed between frames so only those are
+# pushed to the display. Anything that moves the whole picture (scrolling
+# background, overlays, transitions) calls invalidate() to fall back to a
+# full update for that frame; with enabled=False every frame is full.
+# Given a render target, the regions are world rects presented through it.
+class DirtyRegions():
+    def __init__(self, enabled=True, target=None):
+        self.enabled = enabled
+        self.target = target
+        self.previous = []
+        self.current = []
+        self.full = True
+        self.bg_offset = None
+
+    def add(self, rect):
+        self.current.append(rect)
+        return rect
+
+    def extend(self, rects):
+        self.current.extend(rects)
+
+    def invalidate(self):
+        self.full = True
+
+    def set_background(self, offset):
+        # A moving background repaints every pixel
+        if offset != self.bg_offset:
+            self.bg_offset = offset
+            self.full = True
+
+    def needs_full_redraw(self):
+        return self.full or not self.enabled
+
+    def present(self):
+        # Old positions must be repainted as well as new ones
+        rects = None if self.needs_full_redraw() else self.previous + self.current
+        if self.target:
+            self.target.present(rects)
+        elif rects is None:
+            pygame.display.update()
+        else:
+            pygame.display.update(rects)
+        self.previous = self.current
+        self.current = []
+        self.full = False
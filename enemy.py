@@ -2,45 +2,53 @@ import pygame
 import random
 
 class Enemy(pygame.sprite.Sprite):
-	def __init__(self, SCREEN_WIDTH, y, sprite_sheet, scale):
+	__slots__ = ('frame_index', 'update_time', 'direction', 'flip', 'animation_list', 'image', 'mask', 'rect', 'prev_pos', 'pool', 'pool_key')
+
+	def __init__(self, SCREEN_WIDTH, y, sprite_sheet, rng=random, now=0, direction=None):
 		pygame.sprite.Sprite.__init__(self)
 		#define variables
-		self.animation_list = []
-		self.frame_index = 0
-		self.update_time = pygame.time.get_ticks()
-		self.direction = random.choice([-1, 1])
+		if direction is None:
+			direction = rng.choice([-1, 1])
+		self.direction = direction
 		if self.direction == 1:
 			self.flip = True
 		else:
 			self.flip = False
+		self.pool = None
 
-		#load images from spritesheet
+		#reference shared (image, mask) frames from the spritesheet atlas
 		animation_steps = 8
-		for animation in range(animation_steps):
-			image = sprite_sheet.get_image(animation, 32, 32, scale, (0, 0, 0))
-			image = pygame.transform.scale(image, (60, 60))
-			image = pygame.transform.flip(image, self.flip, False)
-			image.set_colorkey((1, 0, 0))
-			self.animation_list.append(image)
-		
-		#select starting image and create rectangle from it
-		self.image = self.animation_list[self.frame_index]
-		self.rect = self.image.get_rect()
+		self.animation_list = sprite_sheet.get_frames(animation_steps, 32, 32, (60, 60), self.flip, (1, 0, 0))
+		self.rect = self.animation_list[0][0].get_rect()
+		self.reset(y, now)
 
+	def reset(self, y, now):
+		#start the animation and flight over, keeping the direction
+		self.frame_index = 0
+		self.update_time = now
+		self.image, self.mask = self.animation_list[self.frame_index]
 		if self.direction == 1:
 			self.rect.x = 380
 		else:
 			self.rect.x = 880
 		self.rect.y = y
+		self.prev_pos = self.rect.topleft
+
+	def retire(self):
+		#leave the game and go back to the pool for reuse
+		self.kill()
+		if self.pool:
+			self.pool.release(self)
 
-	def update(self, scroll, SCREEN_WIDTH):
+	def update(self, scroll, SCREEN_WIDTH, now):
+		self.prev_pos = self.rect.topleft
 		#update animation
 		ANIMATION_COOLDOWN = 50
 		#update image depending on current frame
-		self.image = self.animation_list[self.frame_index]
+		self.image, self.mask = self.animation_list[self.frame_index]
 		#check if enough time has passed since the last update
-		if pygame.time.get_ticks() - self.update_time > ANIMATION_COOLDOWN:
-			self.update_time = pygame.time.get_ticks()
+		if now - self.update_time > ANIMATION_COOLDOWN:
+			self.update_time = now
 			self.frame_index += 1
 		#if the animation has run out then reset back to the start
 		if self.frame_index >= len(self.animation_list):
@@ -52,4 +60,4 @@ class Enemy(pygame.sprite.Sprite):
 
 		#check if gone off screen
 		if self.rect.right < 380 or self.rect.left > 880:
-			self.kill()
\ No newline at end of file
+			self.retire()
\ No newline at end of file
@@ -0,0 +1,299 @@
+import numpy as np
+import pygame
+from simulation import Simulation, platform_texture, SCREEN_HEIGHT, S_SCREEN_WIDTH, E_SCREEN_WIDTH
+
+PLATFORM_HEIGHT = 16
+ENEMY_SIZE = 60
+ANIMATION_COOLDOWN = 50
+ANIMATION_STEPS = 8
+
+
+# Match pygame.Rect, which rounds half away from zero when a float is assigned
+def round_away(values):
+    return np.where(values >= 0, np.floor(values + 0.5), np.ceil(values - 0.5)).astype(np.int64)
+
+
+# Interpolated integer positions, rounded like the sprite renderer does
+def lerp(prev, current, alpha):
+    return np.round(prev + (current - prev) * alpha).astype(np.int64)
+
+
+# Struct-of-arrays storage with slot reuse. Slots never move, so an index
+# handed out by add() stays valid until that entity is killed. Iterating a
+# store yields a view of each live entity, oldest first, as iterating a
+# sprite group yields its sprites.
+class EntityStore():
+    fields = {}
+    view = None
+
+    def __init__(self, capacity=64):
+        self.capacity = capacity
+        self.arrays = {}
+        for name, dtype in self.fields.items():
+            self.arrays[name] = np.zeros(capacity, dtype)
+            setattr(self, name, self.arrays[name])
+        self.alive = np.zeros(capacity, bool)
+        self.count = 0
+        self.live = 0
+        self.free = []
+        self.added = 0
+        # Live slots in order, rebuilt after an add or a kill
+        self.slots = None
+
+    def __len__(self):
+        return self.live
+
+    def __iter__(self):
+        return iter([self.view(self, slot) for slot in self.live_slots().tolist()])
+
+    def grow(self):
+        self.capacity *= 2
+        for name, array in self.arrays.items():
+            self.arrays[name] = np.resize(array, self.capacity)
+            setattr(self, name, self.arrays[name])
+        self.alive = np.resize(self.alive, self.capacity)
+        self.alive[self.count:] = False
+
+    def new_slot(self):
+        if self.free:
+            slot = self.free.pop()
+        else:
+            if self.count == self.capacity:
+                self.grow()
+            slot = self.count
+            self.count += 1
+        self.alive[slot] = True
+        self.live += 1
+        self.order[slot] = self.added
+        self.added += 1
+        self.slots = None
+        return slot
+
+    def kill(self, dead):
+        # dead is a boolean mask over the first self.count slots
+        slots = np.flatnonzero(dead)
+        if not len(slots):
+            return
+        self.alive[slots] = False
+        self.slots = None
+        self.live -= len(slots)
+        self.free.extend(slots.tolist())
+
+    def empty(self):
+        self.alive[:] = False
+        self.count = 0
+        self.live = 0
+        self.free = []
+        self.slots = None
+
+    def live_slots(self):
+        # Oldest first, the order a sprite group keeps
+        if self.slots is None:
+            slots = np.flatnonzero(self.alive[:self.count])
+            self.slots = slots[np.argsort(self.order[slots])]
+        return self.slots
+
+
+# Read-only view of one platform slot, shaped like a Platform sprite for the
+# player's collision check, the level generator and observers
+class PlatformView():
+    def __init__(self, store, slot):
+        self.store = store
+        self.slot = slot
+
+    @property
+    def rect(self):
+        store, slot = self.store, self.slot
+        return pygame.Rect(int(store.x[slot]), int(store.y[slot]), int(store.width[slot]), PLATFORM_HEIGHT)
+
+    @property
+    def moving(self):
+        return bool(self.store.moving[self.slot])
+
+
+# Read-only view of one enemy slot, shaped like an Enemy sprite
+class EnemyView():
+    def __init__(self, store, slot):
+        self.store = store
+        self.slot = slot
+
+    @property
+    def rect(self):
+        store, slot = self.store, self.slot
+        return pygame.Rect(int(store.x[slot]), int(store.y[slot]), ENEMY_SIZE, ENEMY_SIZE)
+
+    @property
+    def direction(self):
+        return int(self.store.direction[self.slot])
+
+
+class PlatformStore(EntityStore):
+    fields = {
+        'x': np.int64, 'y': np.int64, 'prev_x': np.int64, 'prev_y': np.int64,
+        'width': np.int64, 'speed': np.int64, 'direction': np.int64,
+        'move_counter': np.int64, 'moving': bool, 'order': np.int64,
+    }
+    view = PlatformView
+
+    def __init__(self, image, capacity=64):
+        EntityStore.__init__(self, capacity)
+        self.image = image
+        self.textures = {}
+
+    def add(self, x, y, width, moving, move_counter, direction, speed):
+        slot = self.new_slot()
+        self.x[slot] = self.prev_x[slot] = x
+        self.y[slot] = self.prev_y[slot] = y
+        self.width[slot] = width
+        self.moving[slot] = moving
+        self.move_counter[slot] = move_counter
+        self.direction[slot] = direction
+        self.speed[slot] = speed
+        if width not in self.textures:
+            self.textures[width] = platform_texture(self.image, width)
+        return PlatformView(self, slot)
+
+    def update(self, scroll):
+        # Same rules as Platform.update, applied to every live platform at once
+        n = self.count
+        alive = self.alive[:n]
+        x, y = self.x[:n], self.y[:n]
+        self.prev_x[:n] = x
+        self.prev_y[:n] = y
+
+        # Moving platforms side to side
+        moving = alive & self.moving[:n]
+        self.move_counter[:n][moving] += 1
+        x[moving] += self.direction[:n][moving] * self.speed[:n][moving]
+
+        # Change direction if moved fully or hit a wall
+        bounce = alive & ((self.move_counter[:n] >= 100) | (x < S_SCREEN_WIDTH) | (x + self.width[:n] > E_SCREEN_WIDTH))
+        self.direction[:n][bounce] *= -1
+        self.move_counter[:n][bounce] = 0
+
+        # Scroll and cull platforms that left the screen
+        if scroll:
+            y[alive] = round_away(y[alive] + scroll)
+        self.kill(alive & (y > SCREEN_HEIGHT))
+
+    def in_range(self, top, bottom):
+        n = self.count
+        y = self.y[:n]
+        hits = np.flatnonzero(self.alive[:n] & (y > top - PLATFORM_HEIGHT) & (y < bottom))
+        # Lowest top first, oldest first on ties, like PlatformGroup
+        hits = hits[np.lexsort((self.order[hits], y[hits]))]
+        return [PlatformView(self, slot) for slot in hits.tolist()]
+
+    def blit_list(self, alpha):
+        slots = self.live_slots()
+        xs = lerp(self.prev_x[slots], self.x[slots], alpha).tolist()
+        ys = lerp(self.prev_y[slots], self.y[slots], alpha).tolist()
+        textures = self.textures
+        return [(textures[w], (x, y)) for w, x, y in zip(self.width[slots].tolist(), xs, ys)]
+
+
+class EnemyStore(EntityStore):
+    fields = {
+        'x': np.int64, 'y': np.int64, 'prev_x': np.int64, 'prev_y': np.int64,
+        'direction': np.int64, 'frame_index': np.int64, 'image_index': np.int64,
+        'update_time': np.int64, 'order': np.int64,
+    }
+    view = EnemyView
+
+    def __init__(self, sprite_sheet, capacity=16):
+        EntityStore.__init__(self, capacity)
+        # Shared (image, mask) frames for each facing, as Enemy uses them
+        self.frames = {
+            flip: sprite_sheet.get_frames(ANIMATION_STEPS, 32, 32, (ENEMY_SIZE, ENEMY_SIZE), flip, (1, 0, 0))
+            for flip in (False, True)
+        }
+
+    def add(self, direction, y, now):
+        slot = self.new_slot()
+        x = S_SCREEN_WIDTH if direction == 1 else E_SCREEN_WIDTH
+        self.x[slot] = self.prev_x[slot] = x
+        self.y[slot] = self.prev_y[slot] = y
+        self.direction[slot] = direction
+        self.frame_index[slot] = 0
+        self.image_index[slot] = 0
+        self.update_time[slot] = now
+        return slot
+
+    def update(self, scroll, SCREEN_WIDTH, now):
+        # Same rules as Enemy.update, applied to every live enemy at once
+        n = self.count
+        alive = self.alive[:n]
+        x, y = self.x[:n], self.y[:n]
+        self.prev_x[:n] = x
+        self.prev_y[:n] = y
+
+        # Update animation; the drawn frame is the one from before the step
+        frame_index = self.frame_index[:n]
+        self.image_index[:n] = frame_index
+        advance = alive & (now - self.update_time[:n] > ANIMATION_COOLDOWN)
+        self.update_time[:n][advance] = now
+        frame_index[advance] += 1
+        frame_index[frame_index >= ANIMATION_STEPS] = 0
+
+        # Move and cull enemies that left the playfield
+        x[alive] += self.direction[:n][alive] * 2
+        if scroll:
+            y[alive] = round_away(y[alive] + scroll)
+        self.kill(alive & ((x + ENEMY_SIZE < S_SCREEN_WIDTH) | (x > E_SCREEN_WIDTH)))
+
+    def frame(self, slot):
+        return self.frames[bool(self.direction[slot] == 1)][self.image_index[slot]]
+
+    def collide(self, rect, mask):
+        # Rect broadphase over all enemies, then masks for the overlaps
+        n = self.count
+        x, y = self.x[:n], self.y[:n]
+        hits = np.flatnonzero(self.alive[:n] & (x < rect.right) & (x + ENEMY_SIZE > rect.left)
+                              & (y < rect.bottom) & (y + ENEMY_SIZE > rect.top))
+        for slot in hits.tolist():
+            if mask.overlap(self.frame(slot)[1], (int(x[slot]) - rect.x, int(y[slot]) - rect.y)):
+                return True
+        return False
+
+    def blit_list(self, alpha, frame_step=1):
+        slots = self.live_slots()
+        xs = lerp(self.prev_x[slots], self.x[slots], alpha).tolist()
+        ys = lerp(self.prev_y[slots], self.y[slots], alpha).tolist()
+        if frame_step == 1:
+            return [(self.frame(slot)[0], (x, y)) for slot, x, y in zip(slots.tolist(), xs, ys)]
+        # Every nth animation frame, as Simulation.blit_list draws birds
+        frames = self.frame_index[slots]
+        frames = (frames - frames % frame_step).tolist()
+        directions = (self.direction[slots] == 1).tolist()
+        return [(self.frames[flip][frame][0], (x, y)) for flip, frame, x, y in zip(directions, frames, xs, ys)]
+
+
+# Simulation whose platforms and enemies live in NumPy arrays and update in
+# one vectorized pass per tick. Simulation with its sprite classes remains
+# the reference implementation; this one is meant for large entity counts.
+class ArraySimulation(Simulation):
+    def create_groups(self):
+        self.platform_group = PlatformStore(self.assets['platform'])
+        self.enemy_group = EnemyStore(self.assets['bird_sheet'])
+
+    def empty_groups(self):
+        self.platform_group.empty()
+        self.enemy_group.empty()
+
+    def new_platform(self, x, y, width, moving, motion=None):
+        # Draw from the random stream in the same order as Platform.__init__
+        if motion is None:
+            rng = self.random
+            motion = (rng.randint(0, 40), rng.choice([-1, 1]), rng.randint(1, 2))
+        return self.platform_group.add(x, y, width, moving, *motion)
+
+    def spawn_enemy(self, direction=None):
+        if direction is None:
+            direction = self.random.choice([-1, 1])
+        self.enemy_group.add(direction, 100, self.time_ms)
+
+    def hit_enemy(self):
+        return self.enemy_group.collide(self.player.rect, self.player.mask)
+
+    def blit_list(self, alpha):
+        return self.platform_group.blit_list(alpha) + self.enemy_group.blit_list(alpha, self.bird_frame_step)
@@ -0,0 +1,109 @@
+import random
+import threading
+import queue
+
+# Platforms per generated chunk
+CHUNK_PLATFORMS = 20
+
+# Altitudes are measured upwards from the starting platform. The inline
+# generator decides on moving platforms by score when a platform is created,
+# about a screen and a spawn margin below it; chunks decide by altitude.
+SPAWN_AHEAD = 400
+MOVING_SCORE = 500
+MOVING_ALTITUDE = MOVING_SCORE + 670 + SPAWN_AHEAD
+
+# Bird spawn points, checked against the score like the inline spawner
+ENEMY_SCORE = 1700
+ENEMY_SPACING = 200
+
+
+# One vertical slice of the level: platform specs as
+# (x, altitude, width, moving, move_counter, direction, speed) and bird
+# spawn points as (score, direction), both in ascending order
+class Chunk():
+    def __init__(self, index, platforms, enemies):
+        self.index = index
+        self.platforms = platforms
+        self.enemies = enemies
+
+
+# Yields the chunks of a level in order. The same seed and gap range always
+# produce the same level.
+def generate_chunks(seed, platform_gap=(80, 120), x_range=(380, 880)):
+    rng = random.Random(seed)
+    altitude = 0
+    next_enemy = ENEMY_SCORE + 1
+    index = 0
+    while True:
+        platforms = []
+        for i in range(CHUNK_PLATFORMS):
+            # Drawn in the same order as the inline generator and Platform
+            p_w = rng.randint(60, 100)
+            p_x = rng.randint(x_range[0], x_range[1] - p_w)
+            altitude += rng.randint(*platform_gap)
+            p_type = rng.randint(1, 2)
+            p_moving = p_type == 1 and altitude > MOVING_ALTITUDE
+            move_counter = rng.randint(0, 40)
+            direction = rng.choice([-1, 1])
+            speed = rng.randint(1, 2)
+            platforms.append((p_x, altitude, p_w, p_moving, move_counter, direction, speed))
+        enemies = []
+        while next_enemy <= altitude:
+            enemies.append((next_enemy, rng.choice([-1, 1])))
+            next_enemy += ENEMY_SPACING
+        yield Chunk(index, platforms, enemies)
+        index += 1
+
+
+# Builds chunks ahead of the camera on a background thread. The bounded queue
+# keeps the worker at most queue_size chunks ahead; the main loop only ever
+# takes finished chunks. Chunks are built strictly in order, so threading
+# has no effect on the layout.
+class LevelGenerator():
+    def __init__(self, seed=None, platform_gap=(80, 120), queue_size=4, threaded=True):
+        self.seed = seed
+        self.chunks = generate_chunks(seed, platform_gap)
+        self.threaded = threaded
+        if threaded:
+            self.queue = queue.Queue(maxsize=queue_size)
+            self.stopped = threading.Event()
+            self.worker = threading.Thread(target=self.run, daemon=True)
+            self.worker.start()
+
+    def run(self):
+        for chunk in self.chunks:
+            while not self.stopped.is_set():
+                try:
+                    self.queue.put(chunk, timeout=0.1)
+                    break
+                except queue.Full:
+                    pass
+            if self.stopped.is_set():
+                return
+
+    def next_chunk(self):
+        if self.threaded:
+            return self.queue.get()
+        return next(self.chunks)
+
+    def close(self):
+        if self.threaded:
+            self.stopped.set()
+
+
+# Serves chunks built up front, e.g. for benchmarks that should not pay
+# for generation while timing
+class PregeneratedLevel():
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+
+    def next_chunk(self):
+        return next(self.chunks)
+
+    def close(self):
+        pass
+
+
+def pregenerate(seed, count, platform_gap=(80, 120)):
+    chunks = generate_chunks(seed, platform_gap)
+    return [next(chunks) for i in range(count)]
@@ -1,6 +1,7 @@
 import pygame
 import os
 import sys
+from textcache import text_cache
 
 class Button:
     def __init__(self, x, y, width, height, text, font, color=(255, 255, 255), hover_color=(200, 200, 200)):
@@ -15,11 +16,11 @@ class Button:
     def draw(self, surface):
         # Draw button with hover effect
         current_color = self.hover_color if self.is_hovered else self.color
-        pygame.draw.rect(surface, current_color, self.rect, border_radius=8)
-        pygame.draw.rect(surface, (100, 100, 100), self.rect, 2, border_radius=8)  # Border
+        surface.draw_rect(current_color, self.rect, border_radius=8)
+        surface.draw_rect((100, 100, 100), self.rect, 2, border_radius=8)  # Border
         
         # Render text
-        text_surface = self.font.render(self.text, True, (30, 30, 30))
+        text_surface = text_cache.render(self.font, self.text, (30, 30, 30))
         text_rect = text_surface.get_rect(center=self.rect.center)
         surface.blit(text_surface, text_rect)
         
@@ -27,8 +28,8 @@ class Button:
         self.is_hovered = self.rect.collidepoint(pos)
         return self.is_hovered
     
-    def check_click(self):
-        return self.is_hovered and pygame.mouse.get_pressed()[0]
+    def check_click(self, command):
+        return command.name == 'click' and command.down and self.rect.collidepoint(command.pos)
 
 class Slider:
     def __init__(self, x, y, width, height, min_val=0, max_val=100, current_val=50):
@@ -42,7 +43,7 @@ class Slider:
         
     def draw(self, surface):
         # Draw track
-        pygame.draw.rect(surface, (150, 150, 150), self.rect, border_radius=5)
+        surface.draw_rect((150, 150, 150), self.rect, border_radius=5)
         
         # Calculate handle position
         handle_x = self.rect.x + (self.current_val - self.min_val) / (self.max_val - self.min_val) * self.rect.width
@@ -50,45 +51,50 @@ class Slider:
         
         # Draw active part of track
         active_rect = pygame.Rect(self.rect.x, self.rect.y, handle_x - self.rect.x, self.rect.height)
-        pygame.draw.rect(surface, (107, 136, 254), active_rect, border_radius=5)
+        surface.draw_rect((107, 136, 254), active_rect, border_radius=5)
         
         # Draw handle
-        pygame.draw.circle(surface, (255, 255, 255), (int(handle_x), handle_y), self.handle_radius)
-        pygame.draw.circle(surface, (180, 180, 180), (int(handle_x), handle_y), self.handle_radius, 1)
+        surface.draw_circle((255, 255, 255), (int(handle_x), handle_y), self.handle_radius)
+        surface.draw_circle((180, 180, 180), (int(handle_x), handle_y), self.handle_radius, 1)
         
         # Draw value label
-        value_text = self.label_font.render(f"{int(self.current_val)}%", True, (30, 30, 30))
+        value_text = text_cache.render(self.label_font, f"{int(self.current_val)}%", (30, 30, 30))
         value_rect = value_text.get_rect(midleft=(self.rect.right + 10, self.rect.centery))
         surface.blit(value_text, value_rect)
         
-    def update(self, events):
-        mouse_pos = pygame.mouse.get_pos()
-        mouse_clicked = pygame.mouse.get_pressed()[0]
+    def area(self):
+        # Everything draw() can cover at any value: the track, the handle
+        # overhanging its ends and the widest value label
+        label_width, label_height = self.label_font.size(f"{int(self.max_val)}%")
+        height = max(self.handle_radius * 2, label_height) + 2
+        return pygame.Rect(self.rect.x - self.handle_radius - 1, self.rect.centery - height // 2,
+                           self.rect.width + self.handle_radius + 11 + label_width, height)
         
+    def update(self, commands, pointer):
         handle_x = self.rect.x + (self.current_val - self.min_val) / (self.max_val - self.min_val) * self.rect.width
         handle_y = self.rect.y + self.rect.height // 2
         handle_rect = pygame.Rect(handle_x - self.handle_radius, handle_y - self.handle_radius, 
                                 self.handle_radius * 2, self.handle_radius * 2)
         
         # Check for mouse press on handle
-        for event in events:
-            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                if handle_rect.collidepoint(event.pos):
+        for command in commands:
+            if command.name == 'click':
+                if command.down and handle_rect.collidepoint(command.pos):
                     self.dragging = True
-            elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
-                self.dragging = False
+                elif not command.down:
+                    self.dragging = False
         
         # Update position if dragging
         if self.dragging:
             # Calculate new value based on mouse position
-            pos_ratio = max(0, min(1, (mouse_pos[0] - self.rect.x) / self.rect.width))
+            pos_ratio = max(0, min(1, (pointer[0] - self.rect.x) / self.rect.width))
             self.current_val = self.min_val + pos_ratio * (self.max_val - self.min_val)
             return True  # Value changed
         
         return False  # Value unchanged
 
 class GameMenu:
-    def __init__(self, screen_width, screen_height):
+    def __init__(self, screen_width, screen_height, scores=None, sounds=None):
         self.screen_width = screen_width
         self.screen_height = screen_height
         
@@ -121,46 +127,106 @@ class GameMenu:
         # Create volume slider
         slider_width = 250
         self.volume_slider = Slider(button_x, self.menu_y + 280, slider_width, 20, 0, 100, 30)
+        self.default_volume = self.volume_slider.current_val
         
-        # High score
+        # High score, read from the leaderboard's in-memory cache if given
+        self.scores = scores
         self.high_score = 0
         self.load_high_score()
         
+        # Sound bank the volume slider also applies to
+        self.sounds = sounds
+        
         # State
         self.game_paused = False
         
+        # Drop shadow and alpha overlay; off, the scene is dimmed with one multiply
+        self.effects = True
+        
+        # Cached menu layer
+        self.layer = None
+        self.layer_key = None
+        self.needs_redraw = True
+        # Widgets whose look changed since the last draw
+        self.changed = []
+        
     def load_high_score(self):
-        if os.path.exists('score.txt'):
+        if self.scores:
+            self.high_score = self.scores.high_score
+        elif os.path.exists('score.txt'):
             try:
                 with open('score.txt', 'r') as file:
                     self.high_score = int(file.read())
             except:
                 self.high_score = 0
         
-    def draw(self, screen):
+    def build_layer(self, canvas, background):
+        # Composite the scene and everything static in the menu into one
+        # layer at the canvas's resolution; the background is an image or a
+        # snapshot of the canvas
+        if background is None:
+            layer = canvas.layer(alpha=True)
+        else:
+            layer = canvas.layer()
+            if isinstance(background, pygame.Surface):
+                layer.blit(background, (0, 0))
+            else:
+                layer.paste(background)
+        
         # Draw background overlay
-        overlay = pygame.Surface((self.screen_width, self.screen_height), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 180))
-        screen.blit(overlay, (0, 0))
+        if self.effects:
+            overlay = pygame.Surface((self.screen_width, self.screen_height), pygame.SRCALPHA)
+            overlay.fill((0, 0, 0, 180))
+            layer.blit(overlay, (0, 0))
+        else:
+            layer.fill((75, 75, 75), pygame.BLEND_RGB_MULT)
         
         # Draw menu panel
         menu_rect = pygame.Rect(self.menu_x, self.menu_y, self.menu_width, self.menu_height)
-        pygame.draw.rect(screen, self.panel_color, menu_rect, border_radius=15)
+        layer.draw_rect(self.panel_color, menu_rect, border_radius=15)
         
         # Draw shadow effect
-        shadow = pygame.Surface((self.menu_width, self.menu_height), pygame.SRCALPHA)
-        pygame.draw.rect(shadow, (0, 0, 0, 30), (0, 0, self.menu_width, self.menu_height), border_radius=15)
-        screen.blit(shadow, (self.menu_x + 5, self.menu_y + 5))
+        if self.effects:
+            shadow = pygame.Surface((self.menu_width, self.menu_height), pygame.SRCALPHA)
+            pygame.draw.rect(shadow, (0, 0, 0, 30), (0, 0, self.menu_width, self.menu_height), border_radius=15)
+            layer.blit(shadow, (self.menu_x + 5, self.menu_y + 5))
         
         # Draw menu title
-        title_text = self.title_font.render("Game Menu", True, (40, 40, 40))
+        title_text = text_cache.render(self.title_font, "Game Menu", (40, 40, 40))
         title_rect = title_text.get_rect(centerx=self.menu_x + self.menu_width // 2, top=self.menu_y + 30)
-        screen.blit(title_text, title_rect)
+        layer.blit(title_text, title_rect)
         
         # Draw high score
-        score_text = self.subtitle_font.render(f"High Score: {self.high_score}", True, (70, 70, 70))
+        score_text = text_cache.render(self.subtitle_font, f"High Score: {self.high_score}", (70, 70, 70))
         score_rect = score_text.get_rect(centerx=self.menu_x + self.menu_width // 2, top=self.menu_y + 100)
-        screen.blit(score_text, score_rect)
+        layer.blit(score_text, score_rect)
+        
+        # Draw volume label
+        volume_label = text_cache.render(self.subtitle_font, "Volume:", (70, 70, 70))
+        layer.blit(volume_label, (self.menu_x + 50, self.menu_y + 250))
+        
+        return layer
+        
+    def draw(self, screen, background=None, force=False):
+        # Returns the world rects drawn, or None when the whole menu was
+        # redrawn. Rebuild the cached layer only when something it shows
+        # has changed.
+        layer_key = (background, self.high_score, self.game_paused, self.effects)
+        if self.layer is None or layer_key != self.layer_key:
+            self.layer = self.build_layer(screen, background)
+            self.layer_key = layer_key
+            self.needs_redraw = True
+        
+        # Otherwise repaint just the widgets that changed over the layer
+        if background is not None and not (self.needs_redraw or force):
+            rects = []
+            for widget in self.changed:
+                area = widget.area() if isinstance(widget, Slider) else widget.rect
+                rects.append(screen.paste(self.layer, area))
+                widget.draw(screen)
+            self.changed = []
+            return rects
+        screen.paste(self.layer)
         
         # Draw buttons
         self.play_button.text = "Resume" if self.game_paused else "Play"
@@ -168,30 +234,42 @@ class GameMenu:
         self.exit_button.draw(screen)
         
         # Draw volume slider
-        volume_label = self.subtitle_font.render("Volume:", True, (70, 70, 70))
-        screen.blit(volume_label, (self.menu_x + 50, self.menu_y + 250))
         self.volume_slider.draw(screen)
         
-    def update(self, events):
-        mouse_pos = pygame.mouse.get_pos()
+        self.needs_redraw = False
+        self.changed = []
+        return None
+        
+    def effects_volume(self):
+        # Sound effects scale relative to where the slider starts, so they
+        # keep their own levels until it is moved
+        return self.volume_slider.current_val / self.default_volume
+        
+    def update(self, commands, pointer):
+        # Commands and the pointer come from the input system, in world coordinates
         
         # Check button hover
-        self.play_button.check_hover(mouse_pos)
-        self.exit_button.check_hover(mouse_pos)
+        for button in (self.play_button, self.exit_button):
+            was_hovered = button.is_hovered
+            if button.check_hover(pointer) != was_hovered and button not in self.changed:
+                self.changed.append(button)
         
         # Update volume slider
-        volume_changed = self.volume_slider.update(events)
+        volume_changed = self.volume_slider.update(commands, pointer)
         
         # Handle volume change
         if volume_changed:
+            if self.volume_slider not in self.changed:
+                self.changed.append(self.volume_slider)
             pygame.mixer.music.set_volume(self.volume_slider.current_val / 100)
-        
-        for event in events:
-            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                # Check button clicks
-                if self.play_button.check_hover(mouse_pos):
-                    return "play"
-                elif self.exit_button.check_hover(mouse_pos):
-                    return "exit"
+            if self.sounds:
+                self.sounds.set_volume(self.effects_volume())
+        
+        for command in commands:
+            # Check button clicks
+            if self.play_button.check_click(command):
+                return "play"
+            elif self.exit_button.check_click(command):
+                return "exit"
         
         return None
\ No newline at end of file
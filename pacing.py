@@ -0,0 +1,111 @@
+import time
+from collections import deque
+import pygame
+
+# Quality levels from best to cheapest, each keeping the savings of the one
+# before it:
+#   menu_effects     the menu's drop shadow and alpha-blended dim overlay
+#   fade             'bars' redraws the scene under growing bars every frame
+#                    of the game over transition, 'wipe' only paints the
+#                    newly covered strip
+#   bird_frame_step  show every nth frame of the bird animation (drawing
+#                    only; collisions always use the full animation)
+#   bg_layers        background layers drawn, from the back; None for all
+QUALITY_LEVELS = [
+    ('full', {'menu_effects': True, 'fade': 'bars', 'bird_frame_step': 1, 'bg_layers': None}),
+    ('plain_menu', {'menu_effects': False, 'fade': 'bars', 'bird_frame_step': 1, 'bg_layers': None}),
+    ('wipe', {'menu_effects': False, 'fade': 'wipe', 'bird_frame_step': 1, 'bg_layers': None}),
+    ('slow_birds', {'menu_effects': False, 'fade': 'wipe', 'bird_frame_step': 2, 'bg_layers': None}),
+    ('flat_background', {'menu_effects': False, 'fade': 'wipe', 'bird_frame_step': 2, 'bg_layers': 1}),
+]
+
+# How a frame waits out the rest of its time: 'sleep' with Clock.tick,
+# 'busy' spinning with Clock.tick_busy_loop, or 'hybrid', sleeping until
+# SPIN_TIME before the deadline and spinning the rest
+MODES = ['sleep', 'busy', 'hybrid']
+SPIN_TIME = 0.002
+
+# A frame misses its budget when its work takes more than this share of the
+# frame time. Quality drops a level when more than MISS_SHARE of the last
+# WINDOW frames missed, and comes back a level once RESTORE_WINDOW frames in
+# a row have fitted in HEADROOM of the frame time.
+BUDGET_SHARE = 0.9
+MISS_SHARE = 0.2
+WINDOW = 30
+HEADROOM = 0.5
+RESTORE_WINDOW = 180
+
+
+# Paces the game loop to a frame rate and trades quality for time when the
+# frames stop fitting. tick() replaces Clock.tick: it measures how long the
+# frame's work took, adjusts the quality level, waits out the rest of the
+# frame and returns dt in seconds. A level can be pinned with lock().
+class FramePacer():
+    def __init__(self, clock, fps=60, mode='hybrid', level=0, locked=False):
+        self.clock = clock
+        self.fps = fps
+        self.mode = mode
+        self.budget = BUDGET_SHARE / fps
+        self.level = level
+        self.locked = locked
+        self.missed = deque(maxlen=WINDOW)
+        self.miss_count = 0
+        self.calm = 0
+        self.work = 0.0
+        self.frame_start = time.perf_counter()
+        self.changes = 0
+
+    @property
+    def level_name(self):
+        return QUALITY_LEVELS[self.level][0]
+
+    @property
+    def quality(self):
+        return QUALITY_LEVELS[self.level][1]
+
+    def set_level(self, level):
+        level = max(0, min(len(QUALITY_LEVELS) - 1, level))
+        if level != self.level:
+            self.level = level
+            self.changes += 1
+            # Judge the new level on its own frames
+            self.missed.clear()
+            self.miss_count = 0
+            self.calm = 0
+
+    def lock(self, level=None):
+        # Pin the quality level, or let it adapt again with None
+        self.locked = level is not None
+        if self.locked:
+            self.set_level(level)
+
+    def adapt(self, work):
+        missed = work > self.budget
+        if len(self.missed) == WINDOW:
+            self.miss_count -= self.missed[0]
+        self.missed.append(missed)
+        self.miss_count += missed
+        self.calm = self.calm + 1 if work < HEADROOM / self.fps else 0
+        if len(self.missed) == WINDOW and self.miss_count > MISS_SHARE * WINDOW:
+            self.set_level(self.level + 1)
+        elif self.calm >= RESTORE_WINDOW and self.level:
+            self.set_level(self.level - 1)
+
+    def tick(self):
+        now = time.perf_counter()
+        # Time the frame spent working, not waiting
+        self.work = now - self.frame_start
+        if not self.locked:
+            self.adapt(self.work)
+        if self.mode == 'sleep':
+            dt = self.clock.tick(self.fps)
+        elif self.mode == 'busy':
+            dt = self.clock.tick_busy_loop(self.fps)
+        else:
+            # Sleeping is cheap but wakes late; spin the last stretch
+            remaining = 1 / self.fps - self.work - SPIN_TIME
+            if remaining > 0:
+                pygame.time.wait(int(remaining * 1000))
+            dt = self.clock.tick_busy_loop(self.fps)
+        self.frame_start = time.perf_counter()
+        return dt / 1000
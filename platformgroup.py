@@ -0,0 +1,35 @@
+import bisect
+import pygame
+
+
+def _top(sprite):
+    return sprite.rect.top
+
+
+# Sprite group that also keeps its platforms sorted by rect.top, so a
+# collision check only has to look at the platforms in a vertical range.
+# Scrolling moves every platform by the same amount and platforms only move
+# sideways on their own, so the order stays valid between adds and kills.
+class PlatformGroup(pygame.sprite.Group):
+    def __init__(self, *sprites):
+        self.by_top = []
+        self.max_height = 0
+        pygame.sprite.Group.__init__(self, *sprites)
+
+    def add_internal(self, sprite, layer=None):
+        pygame.sprite.Group.add_internal(self, sprite, layer)
+        bisect.insort(self.by_top, sprite, key=_top)
+        self.max_height = max(self.max_height, sprite.rect.height)
+
+    def remove_internal(self, sprite):
+        pygame.sprite.Group.remove_internal(self, sprite)
+        i = bisect.bisect_left(self.by_top, sprite.rect.top, key=_top)
+        while self.by_top[i] is not sprite:
+            i += 1
+        del self.by_top[i]
+
+    def in_range(self, top, bottom):
+        # Platforms whose rect overlaps the band top <= y < bottom
+        lo = bisect.bisect_right(self.by_top, top - self.max_height, key=_top)
+        hi = bisect.bisect_left(self.by_top, bottom, key=_top)
+        return self.by_top[lo:hi]
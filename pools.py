@@ -0,0 +1,34 @@
+# Free lists of retired sprites, keyed by whatever has to match for an
+# instance to be reused as is (a platform's width, a bird's direction).
+# acquire() hands back a retired instance for the caller to reset in place,
+# or None when the caller has to build a new one and register it with add().
+class Pool():
+    def __init__(self, name):
+        self.name = name
+        self.free = {}
+        self.hits = 0
+        self.misses = 0
+        self.allocations = 0
+
+    def acquire(self, key):
+        free = self.free.get(key)
+        if free:
+            self.hits += 1
+            return free.pop()
+        self.misses += 1
+        return None
+
+    def add(self, item, key):
+        self.allocations += 1
+        item.pool = self
+        item.pool_key = key
+        return item
+
+    def release(self, item):
+        self.free.setdefault(item.pool_key, []).append(item)
+
+    def free_count(self):
+        return sum(len(free) for free in self.free.values())
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'allocations': self.allocations, 'free': self.free_count()}
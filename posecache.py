@@ -0,0 +1,16 @@
+import pygame
+
+# Every (pose, flip) variant of a character, scaled once at startup with its
+# collision mask, so movement and drawing only ever look entries up.
+class PoseCache():
+    def __init__(self, images, size):
+        self.size = size
+        self.entries = {}
+        for pose, image in images.items():
+            image = pygame.transform.scale(image, size)
+            for flip in (False, True):
+                variant = pygame.transform.flip(image, flip, False)
+                self.entries[(pose, flip)] = (variant, pygame.mask.from_surface(variant))
+
+    def get(self, pose, flip):
+        return self.entries[(pose, flip)]
@@ -0,0 +1,106 @@
+import json
+import time
+
+# Phases of a frame, in the order they run
+PHASES = ['events', 'move', 'generate', 'platforms', 'enemies', 'draw', 'present']
+
+# A frame counts as a spike when it takes this many times the median
+SPIKE_FACTOR = 2.0
+
+
+# Per-phase frame profiler. Samples go into fixed-size ring buffers: one
+# with per-frame phase totals for the overlay statistics, and one with every
+# individual phase interval for trace export. While disabled every call
+# returns straight away.
+class FrameProfiler():
+    def __init__(self, frames=600, intervals=8192, enabled=False):
+        self.enabled = enabled
+        self.frames = frames
+        self.totals = [[0.0] * (len(PHASES) + 1) for i in range(frames)]
+        self.frame_count = 0
+        self.intervals = intervals
+        self.names = [None] * intervals
+        self.starts = [0.0] * intervals
+        self.durations = [0.0] * intervals
+        self.interval_count = 0
+        self.phase_index = {name: i for i, name in enumerate(PHASES)}
+        self.origin = time.perf_counter()
+        self.frame_start = self.last = self.origin
+        self.current = None
+
+    def toggle(self):
+        self.enabled = not self.enabled
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.frame_start = self.last = time.perf_counter()
+        self.current = self.totals[self.frame_count % self.frames]
+        for i in range(len(self.current)):
+            self.current[i] = 0.0
+
+    def mark(self):
+        # Start timing the next phase from now
+        if self.enabled:
+            self.last = time.perf_counter()
+
+    def lap(self, name):
+        # Charge the time since the last mark or lap to a phase
+        if not self.enabled or self.current is None:
+            return
+        now = time.perf_counter()
+        duration = now - self.last
+        self.current[self.phase_index[name]] += duration
+        slot = self.interval_count % self.intervals
+        self.names[slot] = name
+        self.starts[slot] = self.last
+        self.durations[slot] = duration
+        self.interval_count += 1
+        self.last = now
+
+    def end_frame(self):
+        if not self.enabled or self.current is None:
+            return
+        self.current[-1] = time.perf_counter() - self.frame_start
+        self.frame_count += 1
+        self.current = None
+
+    def recorded_frames(self):
+        count = min(self.frame_count, self.frames)
+        return [self.totals[(self.frame_count - count + i) % self.frames] for i in range(count)]
+
+    def stats(self):
+        # {phase: (p50, p99)} in milliseconds, plus 'frame' and the spike count
+        frames = self.recorded_frames()
+        if not frames:
+            return {}, 0
+        stats = {}
+        for i, name in enumerate(PHASES + ['frame']):
+            values = sorted(frame[i] for frame in frames)
+            stats[name] = (percentile(values, 50) * 1000, percentile(values, 99) * 1000)
+        median = stats['frame'][0] / 1000
+        spikes = sum(1 for frame in frames if frame[-1] > median * SPIKE_FACTOR)
+        return stats, spikes
+
+    def export_trace(self, path):
+        # Chrome trace event format, viewable in chrome://tracing or Perfetto
+        count = min(self.interval_count, self.intervals)
+        events = []
+        for i in range(count):
+            slot = (self.interval_count - count + i) % self.intervals
+            events.append({
+                'name': self.names[slot],
+                'ph': 'X',
+                'ts': (self.starts[slot] - self.origin) * 1e6,
+                'dur': self.durations[slot] * 1e6,
+                'pid': 1,
+                'tid': 1,
+            })
+        with open(path, 'w') as file:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, file)
+        return len(events)
+
+
+def percentile(values, percent):
+    index = min(len(values) - 1, int(len(values) * percent / 100))
+    return values[index]
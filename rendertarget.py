@@ -0,0 +1,244 @@
+import os
+import math
+import weakref
+import pygame
+
+# Presentation filters: 'integer' scales by whole multiples with hard pixel
+# edges and letterboxes the rest (or shrinks with hard edges when the window
+# is smaller than the logical size), 'smooth' fills the window with filtering
+FILTERS = ['integer', 'smooth']
+
+
+# Something to draw on in world coordinates, the 1260x720 space all the game
+# code uses. Positions are mapped into the surface through the view (the
+# part of the world the surface shows) and the render scale, so the same
+# draw calls work whatever the logical resolution is. Images drawn at a
+# render scale other than 1 are scaled once and cached while they live.
+class Canvas():
+    def __init__(self, surface, view, scale=1.0, filter='smooth', scaled=None):
+        self.surface = surface
+        self.view = pygame.Rect(view)
+        self.scale = scale
+        self.filter = filter
+        self.scaled = weakref.WeakKeyDictionary() if scaled is None else scaled
+        # World and surface coordinates are the same, so draws pass straight through
+        self.identity = scale == 1 and self.view.topleft == (0, 0)
+
+    def scale_rect(self, rect):
+        # Edges are rounded, not sizes, so neighbouring rects stay seamless
+        scale = self.scale
+        x = round(rect.x * scale)
+        y = round(rect.y * scale)
+        return pygame.Rect(x, y, round(rect.right * scale) - x, round(rect.bottom * scale) - y)
+
+    def to_surface(self, rect):
+        rect = pygame.Rect(rect).move(-self.view.x, -self.view.y)
+        if self.scale == 1:
+            return rect
+        return self.scale_rect(rect)
+
+    def to_world(self, rect):
+        # The smallest world rect covering a surface rect
+        if self.scale == 1:
+            return rect.move(self.view.x, self.view.y)
+        x = math.floor(rect.x / self.scale)
+        y = math.floor(rect.y / self.scale)
+        right = math.ceil(rect.right / self.scale)
+        bottom = math.ceil(rect.bottom / self.scale)
+        return pygame.Rect(x + self.view.x, y + self.view.y, right - x, bottom - y)
+
+    def point(self, pos):
+        return (round((pos[0] - self.view.x) * self.scale), round((pos[1] - self.view.y) * self.scale))
+
+    def world_point(self, pos):
+        # A point on the surface in world coordinates
+        if self.identity:
+            return pos
+        return (int(pos[0] / self.scale) + self.view.x, int(pos[1] / self.scale) + self.view.y)
+
+    def image(self, image):
+        # The image at the render scale
+        if self.scale == 1:
+            return image
+        scaled = self.scaled.get(image)
+        if scaled is None:
+            size = (max(1, round(image.get_width() * self.scale)), max(1, round(image.get_height() * self.scale)))
+            if self.filter == 'smooth' and image.get_bitsize() >= 24:
+                scaled = pygame.transform.smoothscale(image, size)
+            else:
+                scaled = pygame.transform.scale(image, size)
+            self.scaled[image] = scaled
+        return scaled
+
+    def blit(self, image, pos, area=None):
+        # Returns the world rect drawn to, like Surface.blit
+        if self.identity:
+            return self.surface.blit(image, pos, area)
+        x, y = pos[0], pos[1]
+        if area is not None:
+            area = pygame.Rect(area)
+            world = pygame.Rect(x, y, area.width, area.height)
+        else:
+            world = pygame.Rect(x, y, image.get_width(), image.get_height())
+        if self.scale == 1:
+            self.surface.blit(image, (x - self.view.x, y - self.view.y), area)
+        else:
+            dest = self.to_surface(world)
+            if area is not None:
+                area = self.scale_rect(area)
+            self.surface.blit(self.image(image), dest.topleft, area)
+        return world.clip(self.view)
+
+    def blits(self, blits):
+        # A list of (image, pos) drawn in one Surface.blits call; returns
+        # the world rects drawn to
+        if self.identity:
+            return self.surface.blits(blits)
+        worlds = [pygame.Rect(pos, image.get_size()) for image, pos in blits]
+        if self.scale == 1:
+            view_x, view_y = self.view.topleft
+            self.surface.blits([(image, (pos[0] - view_x, pos[1] - view_y)) for image, pos in blits], False)
+        else:
+            self.surface.blits([(self.image(image), self.to_surface(world).topleft)
+                                for (image, pos), world in zip(blits, worlds)], False)
+        return [world.clip(self.view) for world in worlds]
+
+    def draw_rect(self, colour, rect, width=0, border_radius=0):
+        if self.identity:
+            return pygame.draw.rect(self.surface, colour, rect, width, border_radius)
+        rect = pygame.Rect(rect)
+        scale = self.scale
+        pygame.draw.rect(self.surface, colour, self.to_surface(rect), max(1, round(width * scale)) if width else 0,
+                         round(border_radius * scale))
+        return rect.clip(self.view)
+
+    def draw_line(self, colour, start, end, width=1):
+        if self.identity:
+            return pygame.draw.line(self.surface, colour, start, end, width)
+        drawn = pygame.draw.line(self.surface, colour, self.point(start), self.point(end),
+                                 max(1, round(width * self.scale)))
+        return self.to_world(drawn)
+
+    def draw_circle(self, colour, center, radius, width=0):
+        if self.identity:
+            return pygame.draw.circle(self.surface, colour, center, radius, width)
+        drawn = pygame.draw.circle(self.surface, colour, self.point(center), max(1, round(radius * self.scale)),
+                                   max(1, round(width * self.scale)) if width else 0)
+        return self.to_world(drawn)
+
+    def fill(self, colour, special_flags=0):
+        # Fill everything in view, e.g. with BLEND_RGB_MULT to dim it
+        self.surface.fill(colour, None, special_flags)
+        return pygame.Rect(self.view)
+
+    def snapshot(self):
+        # A copy of what has been drawn so far, to draw back with paste()
+        return Canvas(self.surface.copy(), self.view, self.scale, self.filter, self.scaled)
+
+    def layer(self, alpha=False):
+        # A blank canvas with the same mapping, e.g. to composite a scene
+        if alpha:
+            surface = pygame.Surface(self.surface.get_size(), pygame.SRCALPHA)
+        else:
+            surface = pygame.Surface(self.surface.get_size()).convert()
+        return Canvas(surface, self.view, self.scale, self.filter, self.scaled)
+
+    def paste(self, canvas, rect=None):
+        # Draw a canvas with the same mapping over this one, all of it or
+        # just the world rect given
+        if rect is None:
+            self.surface.blit(canvas.surface, (0, 0))
+            return pygame.Rect(self.view)
+        area = self.to_surface(rect)
+        self.surface.blit(canvas.surface, area.topleft, area)
+        return pygame.Rect(rect).clip(self.view)
+
+
+# The canvas the game draws each frame on, and how it reaches the window.
+#
+# With the whole world in view at scale 1 and no hardware scaling, the canvas
+# is the display surface itself, as before. Otherwise the canvas is the
+# logical resolution: the view (for instance just the playfield column)
+# times the render scale. It is presented either by SDL with pygame.SCALED,
+# which scales in hardware, or with one scale blit into the window.
+class RenderTarget(Canvas):
+    def __init__(self, window_size, view=None, scale=1.0, filter='smooth', hardware=False):
+        if filter not in FILTERS:
+            raise ValueError(f'unknown filter {filter!r}, expected one of {FILTERS}')
+        view = pygame.Rect(view or (0, 0, window_size[0], window_size[1]))
+        self.logical_size = (round(view.width * scale), round(view.height * scale))
+        if min(window_size) <= 0 or min(self.logical_size) <= 0:
+            raise ValueError(f'window {window_size} and logical size {self.logical_size} must not be empty')
+        self.hardware = hardware
+        self.native = not hardware and scale == 1 and self.logical_size == tuple(window_size)
+        if hardware:
+            os.environ['SDL_RENDER_SCALE_QUALITY'] = 'nearest' if filter == 'integer' else 'linear'
+            surface = pygame.display.set_mode(self.logical_size, pygame.SCALED)
+            self.window = surface
+        elif self.native:
+            surface = self.window = pygame.display.set_mode(window_size)
+        else:
+            self.window = pygame.display.set_mode(window_size)
+            surface = pygame.Surface(self.logical_size).convert()
+        Canvas.__init__(self, surface, view, scale, filter)
+        self.factor = self.output_factor()
+        self.output = self.output_rect()
+
+    def world_point(self, pos):
+        # Map a window position, such as the mouse, into the world
+        if not (self.native or self.hardware):
+            factor = self.output.width / self.logical_size[0]
+            pos = ((pos[0] - self.output.x) / factor, (pos[1] - self.output.y) / factor)
+        return Canvas.world_point(self, pos)
+
+    def output_factor(self):
+        # How much the logical picture is scaled to fit the window: a whole
+        # number with the integer filter, unless even 1 does not fit
+        window_width, window_height = self.window.get_size()
+        width, height = self.logical_size
+        factor = min(window_width / width, window_height / height)
+        if self.filter == 'integer' and factor >= 1:
+            return int(factor)
+        return factor
+
+    def output_rect(self):
+        # Where the logical picture lands in the window
+        window_width, window_height = self.window.get_size()
+        width, height = self.logical_size
+        factor = self.factor
+        rect = pygame.Rect(0, 0, round(width * factor), round(height * factor))
+        rect.center = (window_width // 2, window_height // 2)
+        return rect
+
+    def present(self, rects=None):
+        # Push the world rects given, or everything when rects is None
+        if self.native or self.hardware:
+            if rects is None:
+                pygame.display.update()
+            elif self.identity:
+                pygame.display.update(rects)
+            else:
+                pygame.display.update([self.to_surface(rect) for rect in rects])
+            return
+        if rects == []:
+            return
+        output = self.window.subsurface(self.output)
+        if self.filter == 'integer' and isinstance(self.factor, int) and rects is not None:
+            # Whole multiples scale region by region exactly, so only the
+            # changed parts need scaling
+            factor = self.factor
+            bounds = self.surface.get_rect()
+            updates = []
+            for rect in rects:
+                rect = self.to_surface(rect).clip(bounds)
+                if rect:
+                    dest = pygame.Rect(rect.x * factor, rect.y * factor, rect.width * factor, rect.height * factor)
+                    pygame.transform.scale(self.surface.subsurface(rect), dest.size, output.subsurface(dest))
+                    updates.append(dest.move(self.output.topleft))
+            pygame.display.update(updates)
+        elif self.filter == 'integer':
+            pygame.transform.scale(self.surface, self.output.size, output)
+            pygame.display.update(self.output)
+        else:
+            pygame.transform.smoothscale(self.surface, self.output.size, output)
+            pygame.display.update(self.output)
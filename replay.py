@@ -0,0 +1,158 @@
+import os
+import sys
+import time
+import struct
+from simulation import Simulation, load_assets, TICK_RATE
+
+# Extra input bit: set on the first tick after the player paused
+INPUT_PAUSE = 4
+
+# File layout: header, then runs of (input byte, varint run length). The
+# header holds the seed, tick count, flags and the platform cap (0 for
+# none); version 1 files have no cap.
+MAGIC = b'UPRP'
+VERSION = 2
+PREFIX = struct.Struct('<4sB')
+HEADER = struct.Struct('<4sBQIBH')
+HEADER_V1 = struct.Struct('<4sBQIB')
+FLAG_CHUNKED = 1
+
+
+# Records the per-tick input bitfield of one run along with its seed and
+# the simulation settings it ran with. Attach to Simulation.recorder and it
+# is fed every tick.
+class InputRecorder():
+    def __init__(self, seed, chunked=False, max_platforms=None):
+        self.seed = seed
+        self.chunked = chunked
+        self.max_platforms = max_platforms
+        self.runs = []
+        self.ticks = 0
+        self.paused = False
+
+    def mark_pause(self):
+        self.paused = True
+
+    def record(self, inputs):
+        if self.paused:
+            inputs |= INPUT_PAUSE
+            self.paused = False
+        if self.runs and self.runs[-1][0] == inputs:
+            self.runs[-1][1] += 1
+        else:
+            self.runs.append([inputs, 1])
+        self.ticks += 1
+
+    def save(self, path):
+        flags = FLAG_CHUNKED if self.chunked else 0
+        with open(path, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, VERSION, self.seed, self.ticks, flags, self.max_platforms or 0))
+            for value, count in self.runs:
+                file.write(bytes([value]) + encode_varint(count))
+
+
+class Replay():
+    def __init__(self, seed, chunked, inputs, max_platforms=None):
+        self.seed = seed
+        self.chunked = chunked
+        self.inputs = inputs
+        self.max_platforms = max_platforms
+
+    def __len__(self):
+        return len(self.inputs)
+
+
+def encode_varint(value):
+    data = bytearray()
+    while True:
+        byte = value & 0x7f
+        value >>= 7
+        if value:
+            data.append(byte | 0x80)
+        else:
+            data.append(byte)
+            return bytes(data)
+
+
+def load(path):
+    with open(path, 'rb') as file:
+        data = file.read()
+    magic, version = PREFIX.unpack_from(data)
+    if magic != MAGIC or version not in (1, VERSION):
+        raise ValueError('not a replay file: ' + path)
+    if version == 1:
+        magic, version, seed, ticks, flags = HEADER_V1.unpack_from(data)
+        max_platforms = 0
+        pos = HEADER_V1.size
+    else:
+        magic, version, seed, ticks, flags, max_platforms = HEADER.unpack_from(data)
+        pos = HEADER.size
+    inputs = bytearray()
+    while pos < len(data):
+        value = data[pos]
+        pos += 1
+        count = shift = 0
+        while True:
+            byte = data[pos]
+            pos += 1
+            count |= (byte & 0x7f) << shift
+            shift += 7
+            if not byte & 0x80:
+                break
+        inputs += bytes([value]) * count
+    if len(inputs) != ticks:
+        raise ValueError('truncated replay file: ' + path)
+    return Replay(seed, bool(flags & FLAG_CHUNKED), bytes(inputs), max_platforms or None)
+
+
+# Build a simulation in the state the recorded run started from
+def replay_simulation(replay, assets):
+    level = None
+    if replay.chunked:
+        from level import LevelGenerator
+        level = LevelGenerator
+    return Simulation(assets, seed=replay.seed, max_platforms=replay.max_platforms, level=level)
+
+
+# Re-run a replay headless as fast as possible and report the result
+def run_headless(replay, assets=None):
+    sim = replay_simulation(replay, assets or load_assets())
+    times = []
+    start = time.perf_counter()
+    for inputs in replay.inputs:
+        tick_start = time.perf_counter()
+        sim.step(inputs)
+        times.append(time.perf_counter() - tick_start)
+        if sim.game_over:
+            break
+    elapsed = time.perf_counter() - start
+    sim.close()
+    return report(sim, times, elapsed)
+
+
+def report(sim, times, elapsed):
+    times = sorted(times) or [0.0]
+    return {
+        'score': sim.score,
+        'ticks': sim.ticks,
+        'game_over': sim.game_over,
+        'wall_seconds': elapsed,
+        'game_seconds': sim.ticks / TICK_RATE,
+        'p50_ms': times[len(times) // 2] * 1000,
+        'p99_ms': times[min(len(times) - 1, len(times) * 99 // 100)] * 1000,
+        'max_ms': times[-1] * 1000,
+    }
+
+
+def print_report(result):
+    print(f"score {result['score']}  ticks {result['ticks']}  game over {result['game_over']}")
+    print(f"{result['game_seconds']:.1f}s of play in {result['wall_seconds']:.2f}s")
+    print(f"frame time p50 {result['p50_ms']:.3f} ms  p99 {result['p99_ms']:.3f} ms  max {result['max_ms']:.3f} ms")
+
+
+# python replay.py <file>: fast-forward a recorded run without a window
+if __name__ == '__main__':
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    path = os.path.abspath(sys.argv[1])
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    print_report(run_headless(load(path)))
@@ -0,0 +1,155 @@
+import os
+import time
+import queue
+import sqlite3
+import threading
+
+DB_FILE = 'scores.db'
+LEGACY_FILE = 'score.txt'
+DEFAULT_PLAYER = 'player'
+
+# Scores kept in memory for the menu
+TOP_COUNT = 10
+# How long the writer waits for more scores before committing a batch
+BATCH_DELAY = 0.5
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS scores (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scores_by_score ON scores (score DESC);
+CREATE INDEX IF NOT EXISTS scores_by_player ON scores (player, score DESC);
+'''
+
+
+def connect(path=DB_FILE):
+    connection = sqlite3.connect(path)
+    connection.executescript(SCHEMA)
+    return connection
+
+
+# Reads the old single high score file, ignoring one left empty or
+# half-written by a crash
+def read_legacy(path=LEGACY_FILE):
+    try:
+        with open(path, 'r') as file:
+            return int(file.read())
+    except (OSError, ValueError):
+        return None
+
+
+# Local leaderboard in SQLite. The top scores are loaded once and then kept
+# up to date in memory, so the game never waits on the disk: submit() updates
+# the cache straight away and hands the score to a writer thread, which
+# commits whatever has queued up in a single transaction.
+class ScoreStore():
+    def __init__(self, path=DB_FILE, legacy=LEGACY_FILE, top_count=TOP_COUNT):
+        self.path = path
+        self.top_count = top_count
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.worker = None
+
+        connection = connect(self.path)
+        with connection:
+            # Bring over the score from before the leaderboard existed
+            count = connection.execute('SELECT COUNT(*) FROM scores').fetchone()[0]
+            legacy_score = read_legacy(legacy)
+            if count == 0 and legacy_score:
+                connection.execute('INSERT INTO scores (player, score, created) VALUES (?, ?, ?)',
+                                   (DEFAULT_PLAYER, legacy_score, time.time()))
+        self.top = connection.execute('SELECT player, score FROM scores ORDER BY score DESC LIMIT ?',
+                                      (top_count,)).fetchall()
+        connection.close()
+
+    @property
+    def high_score(self):
+        with self.lock:
+            return self.top[0][1] if self.top else 0
+
+    def top_scores(self, count=None):
+        # From the cache, best first, as (player, score)
+        with self.lock:
+            return list(self.top[:count or self.top_count])
+
+    def start(self):
+        self.worker = threading.Thread(target=self.run, daemon=True)
+        self.worker.start()
+
+    def submit(self, score, player=DEFAULT_PLAYER):
+        with self.lock:
+            self.top.append((player, score))
+            self.top.sort(key=lambda entry: -entry[1])
+            del self.top[self.top_count:]
+        row = (player, score, time.time())
+        if self.worker:
+            self.queue.put(row)
+        else:
+            self.write([row])
+
+    def run(self):
+        connection = connect(self.path)
+        while True:
+            row = self.queue.get()
+            if row is None:
+                break
+            batch = [row]
+            # Gather up anything else submitted shortly after
+            deadline = time.monotonic() + BATCH_DELAY
+            stop = False
+            while not stop:
+                try:
+                    row = self.queue.get(timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if row is None:
+                    stop = True
+                else:
+                    batch.append(row)
+            self.write(batch, connection)
+            if stop:
+                break
+        connection.close()
+
+    def write(self, rows, connection=None):
+        # One transaction per batch, so a crash leaves all or none of it
+        own = connection is None
+        if own:
+            connection = connect(self.path)
+        with connection:
+            connection.executemany('INSERT INTO scores (player, score, created) VALUES (?, ?, ?)', rows)
+        if own:
+            connection.close()
+
+    def close(self):
+        # Flush what is queued and wait for the writer to finish
+        if self.worker:
+            self.queue.put(None)
+            self.worker.join()
+            self.worker = None
+
+
+# Queries straight against the database, for tools rather than the frame loop
+def top_scores(count=TOP_COUNT, path=DB_FILE):
+    connection = connect(path)
+    rows = connection.execute('SELECT player, score, created FROM scores ORDER BY score DESC LIMIT ?',
+                              (count,)).fetchall()
+    connection.close()
+    return rows
+
+
+def player_scores(player, count=TOP_COUNT, path=DB_FILE):
+    connection = connect(path)
+    rows = connection.execute('SELECT score, created FROM scores WHERE player = ? ORDER BY score DESC LIMIT ?',
+                              (player, count)).fetchall()
+    connection.close()
+    return rows
+
+
+if __name__ == '__main__':
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    for rank, (player, score, created) in enumerate(top_scores(), 1):
+        print(f"{rank:>2}. {player:<16} {score:>7}  {time.strftime('%Y-%m-%d %H:%M', time.localtime(created))}")
@@ -0,0 +1,439 @@
+import random
+import weakref
+from collections import deque
+import pygame
+from spritesheet import SpriteSheet
+from posecache import PoseCache
+from platformgroup import PlatformGroup
+from level import SPAWN_AHEAD
+from assets import AssetManager
+from enemy import Enemy
+from pools import Pool
+from collisions import CollisionSystem, land
+
+# Game window dimensions
+SCREEN_WIDTH = 1260
+SCREEN_HEIGHT = 720
+S_SCREEN_WIDTH = 380
+E_SCREEN_WIDTH = 880
+
+# Game variables
+SCROLL_THRESH = 200
+GRAVITY = 0.5
+MAX_PLATFORMS = 10
+TICK_RATE = 60
+MAX_STEPS_PER_FRAME = 5
+
+# Difficulty: the simulation runs faster the longer the player climbs
+DIFFICULTY_RAMP = 0.00001 / 60
+
+# Input bits passed to Simulation.step
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+
+
+# Load the images the simulation needs without touching the display.
+# The renderer passes in converted copies instead once a window exists.
+def load_assets():
+    assets = AssetManager(convert=False)
+    assets.load_within(['jumpy', 'jumpy_jump', 'platform', 'bird'], 0)
+    return {
+        'jumpy': assets.get('jumpy'),
+        'jumpy_jump': assets.get('jumpy_jump'),
+        'platform': assets.get('platform'),
+        'bird_sheet': SpriteSheet(assets.get('bird')),
+    }
+
+
+# Player class
+class Player():
+    def __init__(self, x, y, poses):
+        self.poses = poses
+        self.width = 60
+        self.height = 60
+        self.rect = pygame.Rect(0, 0, self.width, self.height)
+        self.rect.center = (x, y)
+        self.vel_y = 0
+        self.flip = False
+        self.acc = 1.5
+        self.friction = -0.1
+        self.bounced = False
+        self.prev_pos = self.rect.topleft
+        self.pose = 'idle'
+        self.image, self.mask = self.poses.get(self.pose, self.flip)
+
+    def move(self, inputs, platform_group):
+        # Reset variables
+        scroll = 0
+        dx = 0
+        dy = 0
+        self.bounced = False
+        self.prev_pos = self.rect.topleft
+
+        # Process input
+        if inputs & INPUT_LEFT:
+            dx = -5.5 * self.acc - self.friction
+            self.flip = True
+        if inputs & INPUT_RIGHT:
+            dx = 5.5 * self.acc + self.friction
+            self.flip = False
+
+        # Gravity
+        self.vel_y += GRAVITY
+        dy += self.vel_y + self.friction
+
+        # Ensure player doesn't go off the edge of the screen
+        if self.rect.left + dx < S_SCREEN_WIDTH:
+            dx = S_SCREEN_WIDTH - self.rect.left
+        if self.rect.right + dx > E_SCREEN_WIDTH:
+            dx = E_SCREEN_WIDTH - self.rect.right
+
+        # Land on any platform in the way
+        dy = land(self, platform_group, dy)
+
+        # Check if the player has bounced to the top of the screen
+        if self.rect.top <= SCROLL_THRESH:
+            # If player is jumping
+            if self.vel_y < 0:
+                scroll = -dy
+                self.pose = 'jump'
+            else:
+                self.pose = 'idle'
+
+        # Update rectangle position
+        self.rect.x += dx
+        self.rect.y += dy + scroll
+
+        # Look up the image and mask for the current pose
+        self.image, self.mask = self.poses.get(self.pose, self.flip)
+
+        return scroll
+
+    def draw(self, surface, pos=None):
+        x, y = pos if pos else self.rect.topleft
+        return surface.blit(self.image, (x - 12, y - 5))
+
+
+# Scaled platform textures, one per source image and width, shared by every
+# platform of that width
+platform_textures = weakref.WeakKeyDictionary()
+
+
+def platform_texture(image, width):
+    textures = platform_textures.get(image)
+    if textures is None:
+        textures = platform_textures[image] = {}
+    texture = textures.get(width)
+    if texture is None:
+        texture = textures[width] = pygame.transform.scale(image, (width, 16))
+    return texture
+
+
+# Platform class
+class Platform(pygame.sprite.Sprite):
+    __slots__ = ('image', 'rect', 'moving', 'move_counter', 'direction', 'speed', 'prev_pos', 'pool', 'pool_key')
+
+    def __init__(self, x, y, width, moving, image, rng=random, motion=None):
+        pygame.sprite.Sprite.__init__(self)
+        self.image = platform_texture(image, width)
+        self.rect = self.image.get_rect()
+        self.pool = None
+        self.reset(x, y, moving, rng, motion)
+
+    def reset(self, x, y, moving, rng=random, motion=None):
+        # Everything but the width, so a pooled platform can be placed again
+        self.moving = moving
+        if motion is None:
+            motion = (rng.randint(0, 40), rng.choice([-1, 1]), rng.randint(1, 2))
+        self.move_counter, self.direction, self.speed = motion
+        self.rect.x = x
+        self.rect.y = y
+        self.prev_pos = self.rect.topleft
+
+    def retire(self):
+        # Leave the game and go back to the pool for reuse
+        self.kill()
+        if self.pool:
+            self.pool.release(self)
+
+    def update(self, scroll):
+        self.prev_pos = self.rect.topleft
+
+        # Moving platform side to side if it is a moving platform
+        if self.moving == True:
+            self.move_counter += 1
+            self.rect.x += self.direction * self.speed
+
+        # Change platform direction if it has moved fully or hit a wall
+        if self.move_counter >= 100 or self.rect.left < S_SCREEN_WIDTH or self.rect.right > E_SCREEN_WIDTH:
+            self.direction *= -1
+            self.move_counter = 0
+
+        # Update platform's vertical position
+        self.rect.y += scroll
+
+        # Check if platform has gone off the screen
+        if self.rect.top > SCREEN_HEIGHT:
+            self.retire()
+
+
+# Headless game state. Advances one tick at a time from an explicit input
+# value and never touches the display, mixer or fonts; the renderer draws
+# from this state and plays sounds for the events it reports.
+class Simulation():
+    def __init__(self, assets, seed=None, max_platforms=None, platform_gap=(80, 120), level=None):
+        self.assets = assets
+        # Most platforms alive at once. None keeps MAX_PLATFORMS for inline
+        # generation and places every level platform that comes in range.
+        self.max_platforms = max_platforms
+        self.platform_gap = platform_gap
+        # Optional chunked level source, called as level(seed, platform_gap)
+        # for each run; without one platforms are generated inline
+        self.level_factory = level
+        self.level = None
+        # Optional FrameProfiler timing the phases of each tick
+        self.profiler = None
+        # Optional InputRecorder fed every tick, and an iterator of recorded
+        # inputs that replaces the inputs passed to step()
+        self.recorder = None
+        self.playback = None
+        # Drawing only: blit_list shows every nth frame of the bird animation
+        self.bird_frame_step = 1
+        self.player_poses = PoseCache({'idle': assets['jumpy'], 'jump': assets['jumpy_jump']}, (60, 60))
+        self.seed = seed
+        self.random = random.Random(seed)
+        # Retired platforms and birds, reused instead of rebuilt
+        self.platform_pool = Pool('platforms')
+        self.enemy_pool = Pool('enemies')
+        self.collisions = CollisionSystem()
+        self.contacts = []
+        self.create_groups()
+        self.reset()
+
+    def create_groups(self):
+        self.platform_group = PlatformGroup()
+        self.enemy_group = pygame.sprite.Group()
+
+    def reset(self, seed=None):
+        # Reseed so a run can be reproduced from its seed alone
+        if seed is not None:
+            self.seed = seed
+            self.random.seed(seed)
+        # Reset variables
+        self.game_over = False
+        self.score = 0
+        self.scroll = 0
+        self.bg_scroll = 0
+        self.prev_bg_scroll = 0
+        self.speed = 1.0
+        self.ticks = 0
+        self.time_ms = 0
+        self.events = []
+        # Create player
+        self.player = Player(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 150, self.player_poses)
+        # Reset enemies and platforms
+        self.empty_groups()
+        # Create starting platform
+        self.last_platform = self.new_platform(SCREEN_WIDTH // 2 - 50, SCREEN_HEIGHT - 50, 100, False)
+        # Start a new level for this run
+        self.close()
+        if self.level_factory:
+            self.level = self.level_factory(self.random.getrandbits(64), self.platform_gap)
+        self.last_altitude = 0
+        self.pending_platforms = deque()
+        self.pending_enemies = deque()
+        self.enemy_due = None
+
+    def empty_groups(self):
+        for sprite in self.enemy_group.sprites() + self.platform_group.sprites():
+            sprite.retire()
+
+    def close(self):
+        if self.level:
+            self.level.close()
+            self.level = None
+
+    def new_platform(self, x, y, width, moving, motion=None):
+        platform = self.platform_pool.acquire(width)
+        if platform:
+            platform.reset(x, y, moving, self.random, motion)
+        else:
+            platform = Platform(x, y, width, moving, self.assets['platform'], self.random, motion)
+            self.platform_pool.add(platform, width)
+        self.platform_group.add(platform)
+        return platform
+
+    def generate_platform(self):
+        rng = self.random
+        p_w = rng.randint(60, 100)
+        p_x = rng.randint(S_SCREEN_WIDTH, E_SCREEN_WIDTH - p_w)
+        p_y = self.last_platform.rect.y - rng.randint(*self.platform_gap)
+        p_type = rng.randint(1, 2)
+        if p_type == 1 and self.score > 500:
+            p_moving = True
+        else:
+            p_moving = False
+        self.last_platform = self.new_platform(p_x, p_y, p_w, p_moving)
+
+    def generate_from_level(self):
+        # Place platforms from ready-made chunks once they come within
+        # SPAWN_AHEAD pixels of the top of the screen
+        while True:
+            if not self.pending_platforms:
+                chunk = self.level.next_chunk()
+                self.pending_platforms.extend(chunk.platforms)
+                self.pending_enemies.extend(chunk.enemies)
+            x, altitude, width, moving, *motion = self.pending_platforms[0]
+            y = self.last_platform.rect.y - (altitude - self.last_altitude)
+            if y < -SPAWN_AHEAD or self.max_platforms is not None and len(self.platform_group) >= self.max_platforms:
+                break
+            self.pending_platforms.popleft()
+            self.last_platform = self.new_platform(x, y, width, moving, motion)
+            self.last_altitude = altitude
+
+        # Birds spawn from the latest spawn point passed, one at a time
+        while self.pending_enemies and self.pending_enemies[0][0] <= self.score:
+            self.enemy_due = self.pending_enemies.popleft()
+        if self.enemy_due and len(self.enemy_group) == 0:
+            self.spawn_enemy(self.enemy_due[1])
+            self.enemy_due = None
+
+    def spawn_enemy(self, direction=None):
+        # Drawn first, as Enemy.__init__ would, since the pool is keyed by it
+        if direction is None:
+            direction = self.random.choice([-1, 1])
+        enemy = self.enemy_pool.acquire(direction)
+        if enemy:
+            enemy.reset(100, self.time_ms)
+        else:
+            enemy = Enemy(SCREEN_WIDTH, 100, self.assets['bird_sheet'], self.random, self.time_ms, direction)
+            self.enemy_pool.add(enemy, direction)
+        self.enemy_group.add(enemy)
+
+    def hit_enemy(self):
+        # Every hazard touching the player this tick
+        self.contacts = self.collisions.hazard_contacts(self.player, self.enemy_group)
+        return bool(self.contacts)
+
+    def step(self, inputs=0):
+        self.events = []
+        if self.game_over:
+            self.scroll = 0
+            return
+        if self.playback is not None:
+            inputs = next(self.playback, 0)
+        if self.recorder:
+            self.recorder.record(inputs)
+        self.ticks += 1
+        self.prev_bg_scroll = self.bg_scroll
+        self.time_ms = self.ticks * 1000 // TICK_RATE
+
+        prof = self.profiler
+        if prof:
+            prof.mark()
+
+        # Get player movement
+        self.scroll = self.player.move(inputs, self.platform_group)
+        if self.player.bounced:
+            self.events.append('jump')
+        if prof:
+            prof.lap('move')
+
+        # Generate platforms and enemies
+        if self.level:
+            self.generate_from_level()
+        else:
+            if len(self.platform_group) < (self.max_platforms or MAX_PLATFORMS):
+                self.generate_platform()
+            if len(self.enemy_group) == 0 and self.score > 1700:
+                self.spawn_enemy()
+        if prof:
+            prof.lap('generate')
+
+        # Update platforms
+        self.platform_group.update(self.scroll)
+        if prof:
+            prof.lap('platforms')
+
+        # Update enemies
+        self.enemy_group.update(self.scroll, SCREEN_WIDTH, self.time_ms)
+
+        # Update score
+        if self.scroll > 0:
+            self.score += int(self.scroll)
+            self.speed += DIFFICULTY_RAMP
+
+        # Update background scroll; the background wraps it when drawing
+        self.bg_scroll += self.scroll
+
+        # Check game over
+        if self.player.rect.top > SCREEN_HEIGHT:
+            self.end_game()
+
+        # Check for collision with enemies
+        elif self.hit_enemy():
+            self.end_game()
+        if prof:
+            prof.lap('enemies')
+
+    def end_game(self):
+        self.game_over = True
+        self.events.append('death')
+
+    # Position of a sprite between its previous and current tick
+    def lerp_pos(self, sprite, alpha):
+        (px, py), (x, y) = sprite.prev_pos, sprite.rect.topleft
+        return (round(px + (x - px) * alpha), round(py + (y - py) * alpha))
+
+    # Images and interpolated positions of every platform and enemy
+    def blit_list(self, alpha):
+        blits = [(platform.image, self.lerp_pos(platform, alpha)) for platform in self.platform_group]
+        step = self.bird_frame_step
+        if step == 1:
+            blits.extend((enemy.image, self.lerp_pos(enemy, alpha)) for enemy in self.enemy_group)
+        else:
+            # Fewer distinct frames shown; the masks still follow every frame
+            blits.extend((enemy.animation_list[enemy.frame_index - enemy.frame_index % step][0],
+                          self.lerp_pos(enemy, alpha)) for enemy in self.enemy_group)
+        return blits
+
+    # Background scroll between ticks. It is never wrapped here, so it
+    # interpolates smoothly; each background layer wraps it when drawing.
+    def lerp_bg_scroll(self, alpha):
+        return self.prev_bg_scroll + (self.bg_scroll - self.prev_bg_scroll) * alpha
+
+
+# Steps a simulation at a fixed tick rate independent of the render rate.
+# Frame time is scaled by the simulation's difficulty speed, collected in an
+# accumulator and spent in whole ticks; alpha is the leftover fraction of a
+# tick, used by the renderer to interpolate positions.
+class FixedStepper():
+    def __init__(self, sim, tick_rate=TICK_RATE, max_steps=MAX_STEPS_PER_FRAME):
+        self.sim = sim
+        self.tick = 1 / tick_rate
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self.alpha = 0.0
+        # Ticks run by the last advance()
+        self.steps = 0
+
+    def reset(self):
+        self.accumulator = 0.0
+        self.alpha = 0.0
+        self.steps = 0
+
+    def advance(self, dt, inputs=0):
+        events = []
+        self.accumulator += dt * self.sim.speed
+        steps = 0
+        while self.accumulator >= self.tick and steps < self.max_steps:
+            self.sim.step(inputs)
+            events.extend(self.sim.events)
+            self.accumulator -= self.tick
+            steps += 1
+        # Drop time we could not catch up on rather than spiralling
+        if steps == self.max_steps:
+            self.accumulator = min(self.accumulator, self.tick)
+        self.alpha = self.accumulator / self.tick
+        self.steps = steps
+        return events
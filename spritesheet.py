@@ -1,13 +1,31 @@
 import pygame
 
+#shared atlas of sliced frames, keyed by (sheet, frame, size, flip)
+atlas = {}
+
 class SpriteSheet():
 	def __init__(self, image):
 		self.sheet = image
 
 	def get_image(self, frame, width, height, scale, colour):
-		image = pygame.Surface((width, height)).convert_alpha()
+		image = pygame.Surface((width, height), pygame.SRCALPHA)
 		image.blit(self.sheet, (0, 0), ((frame * width), 0, width, height))
 		image = pygame.transform.scale(image, (int(width * scale), int(height * scale)))
 		image.set_colorkey(colour)
 
-		return image
\ No newline at end of file
+		return image
+
+	def get_frame(self, frame, width, height, size, flip, colour):
+		#slice, scale and flip each frame only once and share it between users
+		key = (self.sheet, frame, size, flip)
+		if key not in atlas:
+			image = pygame.Surface((width, height), pygame.SRCALPHA)
+			image.blit(self.sheet, (0, 0), ((frame * width), 0, width, height))
+			image = pygame.transform.scale(image, size)
+			image = pygame.transform.flip(image, flip, False)
+			image.set_colorkey(colour)
+			atlas[key] = (image, pygame.mask.from_surface(image))
+		return atlas[key]
+
+	def get_frames(self, count, width, height, size, flip, colour):
+		return [self.get_frame(frame, width, height, size, flip, colour) for frame in range(count)]
@@ -0,0 +1,32 @@
+from collections import OrderedDict
+
+# Bounded LRU cache of rendered text surfaces, keyed by
+# (font, text, colour, antialias). Text only gets rasterized again when one
+# of those actually changes.
+class TextCache():
+    def __init__(self, max_size=128):
+        self.max_size = max_size
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, colour, antialias=True):
+        key = (font, text, tuple(colour), antialias)
+        image = self.surfaces.get(key)
+        if image is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return image
+        self.misses += 1
+        image = font.render(text, antialias, colour)
+        self.surfaces[key] = image
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+        return image
+
+    def clear(self):
+        self.surfaces.clear()
+
+
+# Cache shared by the game and the menu
+text_cache = TextCache()
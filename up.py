@@ -1,57 +1,116 @@
-
 # Import libraries
 import pygame
-import random
 import os
-from pygame import mixer
+import sys
+import random
 from spritesheet import SpriteSheet
-from enemy import Enemy
 from menu import GameMenu
-
-# Initialize pygame
-mixer.init()
+from textcache import text_cache
+from dirtyrects import DirtyRegions
+from rendertarget import RenderTarget
+from controls import InputSystem
+from pacing import FramePacer
+from audio import SoundBank, init_mixer, BUFFER
+from background import Background, FAR_FACTOR, NEAR_FACTOR
+from level import LevelGenerator
+from assets import AssetManager, MENU_ASSETS, GAMEPLAY_ASSETS
+from profiler import FrameProfiler, PHASES
+from scores import ScoreStore
+import replay
+from simulation import (Simulation, FixedStepper, SCREEN_WIDTH, SCREEN_HEIGHT, S_SCREEN_WIDTH,
+                        E_SCREEN_WIDTH, SCROLL_THRESH)
+
+# Initialize pygame, with a small mixer buffer so effects play promptly;
+# UP_AUDIO_BUFFER=<frames> raises it if the sound crackles
+init_mixer(int(os.environ.get('UP_AUDIO_BUFFER', BUFFER)))
 pygame.init()
 
-# Game window dimensions
-SCREEN_WIDTH = 1260
-SCREEN_HEIGHT = 720
-S_SCREEN_WIDTH = 380
-
-# Create game window
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+# Logical resolution: the game draws in world coordinates into a canvas
+# showing RENDER_VIEW of the world at RENDER_SCALE, which is then scaled to
+# the window ('integer' or 'smooth'), by SDL if HARDWARE_SCALING. The full
+# view at scale 1 in a window its size draws straight to the display.
+# UP_VIEW=playfield UP_SCALE=0.5 UP_WINDOW=1000x1440 and so on override them.
+VIEWS = {
+    'full': (0, 0, SCREEN_WIDTH, SCREEN_HEIGHT),
+    'playfield': (S_SCREEN_WIDTH, 0, E_SCREEN_WIDTH - S_SCREEN_WIDTH, SCREEN_HEIGHT),
+}
+RENDER_VIEW = os.environ.get('UP_VIEW', 'full')
+RENDER_SCALE = float(os.environ.get('UP_SCALE', 1))
+RENDER_FILTER = os.environ.get('UP_FILTER', 'smooth')
+HARDWARE_SCALING = os.environ.get('UP_HARDWARE') == '1'
+WINDOW_SIZE = tuple(int(n) for n in os.environ.get('UP_WINDOW', f'{SCREEN_WIDTH}x{SCREEN_HEIGHT}').split('x'))
+
+# Create game window and the canvas everything is drawn on
+screen = RenderTarget(WINDOW_SIZE, VIEWS[RENDER_VIEW], RENDER_SCALE, RENDER_FILTER, HARDWARE_SCALING)
 pygame.display.set_caption('Up Up Up')
 
-# Set frame rate
+# All input goes through here as commands, with mouse positions in the world
+controls = InputSystem(to_world=screen.world_point)
+
+# Set frame rate (render only; physics runs at simulation.TICK_RATE)
 clock = pygame.time.Clock()
 FPS = 60
 
-# Load music and sounds
-pygame.mixer.music.load('assets1/music1.mp3')
-pygame.mixer.music.set_volume(0.3)
-pygame.mixer.music.play(-1, 0.0)
-jump_fx = pygame.mixer.Sound('assets1/jump.mp3')
-jump_fx.set_volume(0.5)
-death_fx = pygame.mixer.Sound('assets1/death.mp3')
-death_fx.set_volume(0.4)
+# Frame pacing: PACING is how a frame waits out its time ('sleep', 'busy' or
+# 'hybrid'), and quality steps down when frames miss their budget and back
+# up when there is headroom. UP_QUALITY=<level> pins a quality level.
+PACING = os.environ.get('UP_PACING', 'hybrid')
+pacer = FramePacer(clock, FPS, PACING)
+if 'UP_QUALITY' in os.environ:
+    pacer.lock(int(os.environ['UP_QUALITY']))
+quality_level = None
+
+# Only push changed screen regions to the display; False for full redraws
+DIRTY_RECTS = True
+
+# Most platforms alive at once; UP_PLATFORMS=6 thins out the climb. Unset,
+# every platform the level places is kept. Replays record it.
+PLATFORM_CAP = int(os.environ['UP_PLATFORMS']) if 'UP_PLATFORMS' in os.environ else None
+
+# UP_ENTITIES=arrays keeps platforms and birds in NumPy arrays instead of
+# sprites, for stress runs with many of them (needs NumPy)
+if os.environ.get('UP_ENTITIES') == 'arrays':
+    from entitystore import ArraySimulation as GameSimulation
+else:
+    GameSimulation = Simulation
+
+# Frame profiler: F3 toggles it with its overlay, F4 writes a Chrome trace.
+# Set UP_PROFILE=1 to have it running from the start.
+profiler = FrameProfiler(enabled=os.environ.get('UP_PROFILE') == '1')
+TRACE_FILE = 'frame_trace.json'
+overlay_lines = []
+
+# Every run is recorded to REPLAY_FILE. Start with --replay <file> to watch
+# a recorded run instead of playing; python replay.py <file> runs it headless.
+REPLAY_FILE = 'last_run.upr'
+recorder = None
+playback = None
+playback_frames = []
+if '--replay' in sys.argv:
+    playback = replay.load(sys.argv[sys.argv.index('--replay') + 1])
+    # Play back with the cap the run was recorded with
+    PLATFORM_CAP = playback.max_platforms
+
+# Load what the menu needs now, plus whatever else fits in the
+# time-to-first-frame budget (seconds), and stream the rest in
+FIRST_FRAME_BUDGET = 0.1
+assets = AssetManager()
+assets.load_within(MENU_ASSETS, FIRST_FRAME_BUDGET)
+assets.start()
+
+# Sound effects, played on their own channels as they stream in
+sounds = SoundBank(assets)
+music_started = False
 
 # Game variables
-SCROLL_THRESH = 200
-GRAVITY = 0.5
-MAX_PLATFORMS = 10
-scroll = 0
-bg_scroll = 0
-game_over = False
-score = 0
 fade_counter = 0
-TARGET_FPS = 60
+FADE_SPEED = 600
 game_state = "menu"  # Possible states: menu, playing, game_over, paused
 
-# Load high score
-if os.path.exists('score.txt'):
-    with open('score.txt', 'r') as file:
-        high_score = int(file.read())
-else:
-    high_score = 0
+# Load the leaderboard; scores are written on a background thread
+scores = ScoreStore()
+scores.start()
+high_score = scores.high_score
 
 # Define colours
 WHITE = (255, 255, 255)
@@ -61,211 +120,207 @@ PANEL = (107, 136, 254)
 # Define font
 font_small = pygame.font.SysFont('Lucida Sans', 26)
 font_big = pygame.font.SysFont('Lucida Sans', 30)
+font_overlay = pygame.font.SysFont('Consolas', 16)
 
-# Load images
-jumpy_image = pygame.image.load('assets1/jump.png').convert_alpha()
-jumpy_jump = pygame.image.load('assets1/jimp3.png').convert_alpha()
-bg_image = pygame.image.load('assets1/bg.png').convert_alpha()
-platform_image = pygame.image.load('assets1/wood.png').convert_alpha()
-
-# Bird spritesheet
-bird_sheet_img = pygame.image.load('assets1/bird.png').convert_alpha()
-bird_sheet = SpriteSheet(bird_sheet_img)
+# Background image, needed for the menu
+bg_image = assets.get('bg')
 
 # Create the game menu
-menu = GameMenu(SCREEN_WIDTH, SCREEN_HEIGHT)
+menu = GameMenu(SCREEN_WIDTH, SCREEN_HEIGHT, scores, sounds)
+sounds.set_volume(menu.effects_volume())
 
 # Function for outputting text onto the screen
 def draw_text(text, font, text_col, x, y):
-    img = font.render(text, True, text_col)
-    screen.blit(img, (x, y))
+    img = text_cache.render(font, text, text_col)
+    return screen.blit(img, (x, y))
 
 # Function for drawing info panel
 def draw_panel():
-    pygame.draw.rect(screen, PANEL, (380, 0, 500, 30))
-    pygame.draw.line(screen, WHITE, (S_SCREEN_WIDTH, 30), (880, 30), 2)
-    draw_text('SCORE: ' + str(score), font_small, WHITE, 390, 0)
+    screen.draw_rect(PANEL, (380, 0, 500, 30))
+    screen.draw_line(WHITE, (S_SCREEN_WIDTH, 30), (880, 30), 2)
+    draw_text('SCORE: ' + str(sim.score), font_small, WHITE, 390, 0)
+    return pygame.Rect(380, 0, 500, 32)
 
 # Function for drawing the background
 def draw_bg(bg_scroll):
-    screen.blit(bg_image, (0, 0 + bg_scroll))
-    screen.blit(bg_image, (0, -750 + bg_scroll))
+    background.draw(screen, bg_scroll)
+
+# Function for repainting the background under just the given regions
+def restore_bg(bg_scroll, rects):
+    background.draw_rects(screen, bg_scroll, rects)
+
+# Function for drawing the game world from the simulation state
+def draw_world(alpha=1.0):
+    # Platforms and birds in one batched blit
+    rects = screen.blits(sim.blit_list(alpha))
+    rects.append(sim.player.draw(screen, sim.lerp_pos(sim.player, alpha)))
+    return rects
+
+# Function for drawing the profiler overlay, refreshed twice a second
+def draw_overlay():
+    global overlay_lines
+    if profiler.frame_count % 30 == 0 or not overlay_lines:
+        stats, spikes = profiler.stats()
+        overlay_lines = ['phase       p50 ms  p99 ms']
+        for name in PHASES + ['frame']:
+            if name in stats:
+                overlay_lines.append(f'{name:<10} {stats[name][0]:>7.2f} {stats[name][1]:>7.2f}')
+        overlay_lines.append(f'spikes     {spikes:>7}')
+        overlay_lines.append(f'quality    {pacer.level_name}')
+        # Time to first frame against its budget
+        if assets.first_frame_time is not None:
+            overlay_lines.append(f'1st frame  {assets.first_frame_time * 1000:>7.2f}'
+                                 + (' over' if assets.over_budget() else ''))
+        # Input-to-photon latency of recent presses
+        latency = controls.latency()
+        if latency:
+            overlay_lines.append(f'input      {latency[0]:>7.2f} {latency[1]:>7.2f}')
+        # Pool counters, which should stop growing once a run is under way
+        if sim:
+            overlay_lines.append('pool          hits  allocs')
+            for pool in (sim.platform_pool, sim.enemy_pool):
+                overlay_lines.append(f'{pool.name:<10} {pool.hits:>7} {pool.allocations:>7}')
+    rect = pygame.Rect(screen.view.x + 10, 40, 250, 18 * len(overlay_lines) + 8)
+    screen.draw_rect(BLACK, rect)
+    for i, line in enumerate(overlay_lines):
+        draw_text(line, font_overlay, WHITE, rect.x + 4, rect.y + 4 + i * 18)
+    return rect
+
+# Function for applying the pacer's quality level to what it affects
+def apply_quality():
+    global quality_level
+    quality = pacer.quality
+    menu.effects = quality['menu_effects']
+    if sim:
+        sim.bird_frame_step = quality['bird_frame_step']
+        background.max_layers = quality['bg_layers']
+    quality_level = pacer.level
+    dirty.invalidate()
 
 def reset_game():
-    
-    global game_over, score, fade_counter, scroll, bg_scroll
+    global fade_counter, sim, stepper, recorder, background
     # Reset variables
-    game_over = False
-    score = 0 
     fade_counter = 0
-    scroll = 0
-    bg_scroll = 0
-    # Reposition jumpy
-    jumpy.rect.center = (SCREEN_WIDTH // 2, SCREEN_HEIGHT - 150)
-    # Reset enemies
-    enemy_group.empty()
-    # Reset platforms
-   # platform_group.empty() 
-    # Create starting platform
-    platform = Platform(SCREEN_WIDTH // 2 - 50, SCREEN_HEIGHT - 50, 100, False)
-    platform_group.add(platform)
-
-  
-
-# Player class
-class Player():
-    def __init__(self, x, y):
-        self.image = pygame.transform.scale(jumpy_image, (60, 60))
-        self.width = 60
-        self.height = 60
-        self.rect = pygame.Rect(0, 0, self.width, self.height)
-        self.rect.center = (x, y)
-        self.vel_y = 0
-        self.flip = False
-        self.acc = 1.5
-        self.friction = -0.1
-
-    def move(self):
-        # Reset variables
-        scroll = 0
-        dx = 0
-        dy = 0
-
-        # Process keypresses
-        key = pygame.key.get_pressed()
-        if key[pygame.K_a] or key[pygame.K_LEFT]:
-            dx = -5.5 * self.acc - self.friction
-            self.flip = True
-        if key[pygame.K_d] or key[pygame.K_RIGHT]:
-            dx = 5.5 * self.acc + self.friction
-            self.flip = False
-
-        # Gravity
-        self.vel_y += GRAVITY
-        dy += self.vel_y + self.friction
-  
-        # Ensure player doesn't go off the edge of the screen
-        if self.rect.left + dx < S_SCREEN_WIDTH:
-            dx = S_SCREEN_WIDTH - self.rect.left
-        if self.rect.right + dx > 880:
-            dx = 880 - self.rect.right
-
-        # Check collision with platforms
-        for platform in platform_group:
-            # Collision in the y direction
-            if platform.rect.colliderect(self.rect.x, self.rect.y + dy, self.width, self.height):
-                # Check if above the platform
-                if self.rect.bottom < platform.rect.centery:
-                    if self.vel_y > 0:
-                        self.rect.bottom = platform.rect.top
-                        dy = 0
-                        self.vel_y = -20
-                        jump_fx.play()
-                        
-        # Check if the player has bounced to the top of the screen
-        if self.rect.top <= SCROLL_THRESH:
-            # If player is jumping
-            if self.vel_y < 0:
-                scroll = -dy
-                self.image = pygame.transform.scale(jumpy_jump, (60, 60))
-            else:
-                self.image = pygame.transform.scale(jumpy_image, (60, 60))
-                
-        # Update rectangle position
-        self.rect.x += dx
-        self.rect.y += dy + scroll
-
-        # Update mask
-        self.mask = pygame.mask.from_surface(self.image)
-
-        return scroll
-
-    def draw(self):
-        screen.blit(pygame.transform.flip(self.image, self.flip, False), (self.rect.x - 12, self.rect.y - 5))
-
-# Platform class
-class Platform(pygame.sprite.Sprite):
-    def __init__(self, x, y, width, moving):
-        pygame.sprite.Sprite.__init__(self)
-        self.image = pygame.transform.scale(platform_image, (width, 16))
-        self.moving = moving
-        self.move_counter = random.randint(0, 40)
-        self.direction = random.choice([-1, 1])
-        self.speed = random.randint(1, 2)
-        self.rect = self.image.get_rect()
-        self.rect.x = x
-        self.rect.y = y
-
-    def update(self, scroll):
-        # Moving platform side to side if it is a moving platform
-        if self.moving == True:
-            self.move_counter += 1
-            self.rect.x += self.direction * self.speed
-
-        # Change platform direction if it has moved fully or hit a wall
-        if self.move_counter >= 100 or self.rect.left < S_SCREEN_WIDTH or self.rect.right > 880:
-            self.direction *= -1
-            self.move_counter = 0
-
-        # Update platform's vertical position
-        self.rect.y += scroll
-
-        # Check if platform has gone off the screen
-        if self.rect.top > SCREEN_HEIGHT:
-            self.kill()
-
-# Create player instance
-jumpy = Player(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 150)
-
-# Create sprite groups
-platform_group = pygame.sprite.Group()
-enemy_group = pygame.sprite.Group()
-
-# Create starting platform
-platform = Platform(SCREEN_WIDTH // 2 - 50, SCREEN_HEIGHT - 50, 100, False)
-platform_group.add(platform)
+    run_seed = playback.seed if playback else random.getrandbits(64)
+    if sim is None:
+        # Create the simulation once its images have streamed in
+        assets.wait(GAMEPLAY_ASSETS)
+        sim = GameSimulation({
+            'jumpy': assets.get('jumpy'),
+            'jumpy_jump': assets.get('jumpy_jump'),
+            'platform': assets.get('platform'),
+            'bird_sheet': SpriteSheet(assets.get('bird')),
+        }, seed=run_seed, max_platforms=PLATFORM_CAP, level=LevelGenerator)
+        stepper = FixedStepper(sim)
+        sim.profiler = profiler
+        # Parallax background: the big clouds of bg2 fill the playfield and
+        # scroll with it, the small far clouds show either side at half speed
+        background = Background(SCREEN_WIDTH, SCREEN_HEIGHT)
+        background.add_layer(bg_image, FAR_FACTOR)
+        background.add_layer(assets.get('bg2'), NEAR_FACTOR, S_SCREEN_WIDTH, E_SCREEN_WIDTH - S_SCREEN_WIDTH)
+        apply_quality()
+    else:
+        sim.reset(run_seed)
+        stepper.reset()
+    # Record this run, or feed it from the replay being watched
+    if playback:
+        sim.playback = iter(playback.inputs)
+        playback_frames.clear()
+    else:
+        recorder = replay.InputRecorder(run_seed, chunked=True, max_platforms=PLATFORM_CAP)
+        sim.recorder = recorder
+
+# Function for saving an unfinished run when quitting
+def save_unfinished_run():
+    if sim and not playback and not sim.game_over and sim.score > 0:
+        scores.submit(sim.score)
+
+# Function for saving the recording of the current run
+def save_recording():
+    if recorder and recorder.ticks:
+        recorder.save(REPLAY_FILE)
+
+# The simulation is created when the first game starts
+sim = None
+stepper = None
+background = None
+dirty = DirtyRegions(DIRTY_RECTS, screen)
+
+# Snapshot of the frozen game shown under the pause menu
+paused_scene = None
+last_state = None
 
 # Game loop
 run = True
 while run:
-    clock.tick(FPS)
+    dt = pacer.tick()
+    profiler.begin_frame()
+    if pacer.level != quality_level:
+        apply_quality()
+
+    # Start the music once it has loaded
+    if not music_started and assets.is_ready('music'):
+        pygame.mixer.music.load(assets.get('music'), 'mp3')
+        pygame.mixer.music.set_volume(menu.volume_slider.current_val / 100)
+        pygame.mixer.music.play(-1, 0.0)
+        music_started = True
     
-    # Handle events first
-    events = pygame.event.get()
-    for event in events:
-        if event.type == pygame.QUIT:
-            # Update high score before quitting
-            if score > high_score:
-                high_score = score
-                with open('score.txt', 'w') as file:
-                    file.write(str(high_score))
+    # Handle input first, drained once into this frame's commands
+    commands = controls.poll()
+    for command in commands:
+        if not command.down:
+            continue
+        if command.name == 'quit':
+            # Save the run before quitting
+            save_unfinished_run()
+            save_recording()
             run = False
-        elif event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_ESCAPE:
-                if game_state == "playing":
-                    # Pause the game
-                    game_state = "menu"
-                    menu.game_paused = True
-                elif game_state == "menu" and menu.game_paused:
-                    # Resume the game
-                    game_state = "playing"
+        elif command.name == 'profile':
+            profiler.toggle()
+            dirty.invalidate()
+        elif command.name == 'trace':
+            profiler.export_trace(TRACE_FILE)
+        elif command.name == 'back':
+            if game_state == "playing":
+                # Pause the game
+                game_state = "menu"
+                menu.game_paused = True
+                if recorder:
+                    recorder.mark_pause()
+            elif game_state == "menu" and menu.game_paused:
+                # Resume the game
+                game_state = "playing"
     
+    profiler.lap('events')
+
+    # Repaint everything after a state change
+    if game_state != last_state:
+        dirty.invalidate()
+        paused_scene = None
+        last_state = game_state
+
     # Game state machine
     if game_state == "menu":
-        # Draw the game screen underneath if paused
+        # Capture the game screen underneath once if paused
         if menu.game_paused:
-            draw_bg(bg_scroll)
-            platform_group.draw(screen)
-            enemy_group.draw(screen)
-            jumpy.draw()
-            draw_panel()
+            if paused_scene is None:
+                draw_bg(sim.lerp_bg_scroll(stepper.alpha))
+                draw_world(stepper.alpha)
+                draw_panel()
+                paused_scene = screen.snapshot()
+            menu_bg = paused_scene
         else:
-            # Just draw background if not paused
-            draw_bg(0)
+            # Just the background if not paused
+            menu_bg = bg_image
         
-        # Update and draw menu
-        menu_action = menu.update(events)
-        menu.draw(screen)
+        # Update and draw menu, which skips drawing while nothing changes
+        menu_action = menu.update(commands, controls.pointer)
+        controls.handled()
+        menu_rects = menu.draw(screen, menu_bg, dirty.full)
+        if menu_rects is None:
+            dirty.invalidate()
+        else:
+            dirty.extend(menu_rects)
         
         # Handle menu actions
         if menu_action == "play":
@@ -278,118 +333,116 @@ while run:
                 reset_game()
                 game_state = "playing"
         elif menu_action == "exit":
-            # Update high score before quitting
-            if score > high_score:
-                high_score = score
-                with open('score.txt', 'w') as file:
-                    file.write(str(high_score))
+            # Save the run before quitting
+            save_unfinished_run()
+            save_recording()
             run = False
     
     elif game_state == "playing":
-        # Draw background
-        draw_bg(bg_scroll)
-        
-        if not game_over:
-            # Get player movement
-            scroll = jumpy.move()
-
-            # Generate platforms
-            if len(platform_group) < MAX_PLATFORMS:
-                p_w = random.randint(60, 100) 
-                p_x = random.randint(S_SCREEN_WIDTH, 880 - p_w)
-                p_y = platform.rect.y - random.randint(80, 120)
-                p_type = random.randint(1, 2)
-                if p_type == 1 and score > 500:
-                    p_moving = True
+        if not sim.game_over:
+            # Advance the simulation by however many ticks fit in this frame
+            sim_events = stepper.advance(dt, controls.inputs())
+
+            # Play sounds for simulation events
+            for sim_event in sim_events:
+                if sim_event == 'jump':
+                    sounds.play('jump_fx')
+                elif sim_event == 'death':
+                    sounds.play('death_fx')
+
+            # Keep the recording, or report on the replay, once the run ends
+            if playback:
+                playback_frames.append(dt)
+            if sim.game_over:
+                if playback:
+                    replay.print_report(replay.report(sim, playback_frames, sum(playback_frames)))
                 else:
-                    p_moving = False
-                platform = Platform(p_x, p_y, p_w, p_moving)
-                platform_group.add(platform)
-
-            # Update platforms
-            platform_group.update(scroll)
-
-            # Generate enemies
-            if len(enemy_group) == 0 and score > 1700:
-                enemy = Enemy(SCREEN_WIDTH, 100, bird_sheet, 1.5)
-                enemy_group.add(enemy)
-
-            # Update enemies
-            enemy_group.update(scroll, SCREEN_WIDTH)
-
-            # Update score
-            if scroll > 0:
-                score += int(scroll)
-                FPS+=.00001
+                    save_recording()
+                    # Add the run to the leaderboard
+                    scores.submit(sim.score)
+
+        # Input shows on screen once a tick has used it; once the run is
+        # over there is nothing left for it to change
+        if stepper.steps or sim.game_over:
+            controls.handled()
+
+        # Draw background, or only repaint it where sprites were last frame;
+        # the cheap wipe just paints over what is already on screen
+        bg_scroll = sim.lerp_bg_scroll(stepper.alpha)
+        wiping = sim.game_over and fade_counter > 0 and pacer.quality['fade'] == 'wipe'
+        if sim.game_over and not wiping:
+            dirty.invalidate()
+        dirty.set_background(int(bg_scroll))
+        if not wiping and dirty.needs_full_redraw():
+            draw_bg(bg_scroll)
+        elif not wiping:
+            restore_bg(bg_scroll, dirty.previous)
 
+        if not sim.game_over:
             # Draw line at previous high score
-            pygame.draw.line(screen, WHITE, (S_SCREEN_WIDTH, score - high_score + SCROLL_THRESH), (SCREEN_WIDTH, score - high_score + SCROLL_THRESH), 3)
-            draw_text('HIGH SCORE', font_small, WHITE, S_SCREEN_WIDTH, score - high_score + SCROLL_THRESH)
-
-            # Update background scroll
-            bg_scroll += scroll
-
-            # Reset background scroll
-            if bg_scroll >= 750:
-                bg_scroll = 0
+            dirty.add(screen.draw_line(WHITE, (S_SCREEN_WIDTH, sim.score - high_score + SCROLL_THRESH), (SCREEN_WIDTH, sim.score - high_score + SCROLL_THRESH), 3))
+            dirty.add(draw_text('HIGH SCORE', font_small, WHITE, S_SCREEN_WIDTH, sim.score - high_score + SCROLL_THRESH))
 
             # Draw sprites
-            platform_group.draw(screen)
-            enemy_group.draw(screen)
-            jumpy.draw()
+            dirty.extend(draw_world(stepper.alpha))
 
             # Draw panel
-            draw_panel()
-
-            # Check game over
-            if jumpy.rect.top > SCREEN_HEIGHT:
-                game_over = True
-                death_fx.play()
-                
-            # Check for collision with enemies
-            if pygame.sprite.spritecollide(jumpy, enemy_group, False):
-                if pygame.sprite.spritecollide(jumpy, enemy_group, False, pygame.sprite.collide_mask):
-                    game_over = True
-                    death_fx.play()
+            dirty.add(draw_panel())
         
         else:  # Game over state
-            if fade_counter < SCREEN_WIDTH:
-                fade_counter += 10
-                for y in range(0, 16, 2):
-                    pygame.draw.rect(screen, BLACK, (0, y * 100, fade_counter, 100))
-                    pygame.draw.rect(screen, BLACK, (SCREEN_WIDTH - fade_counter, (y + 1) * 100, SCREEN_WIDTH, 100))
+            # Wipe across just the part of the world in view
+            view = screen.view
+            if fade_counter < view.width:
+                start = int(fade_counter)
+                fade_counter += FADE_SPEED * dt
+                if pacer.quality['fade'] == 'wipe':
+                    # One rect over just the strip newly covered
+                    dirty.add(screen.draw_rect(BLACK, (view.x + start, 0, int(fade_counter) - start + 1, SCREEN_HEIGHT)))
+                else:
+                    for y in range(0, 16, 2):
+                        screen.draw_rect(BLACK, (view.x, y * 100, fade_counter, 100))
+                        screen.draw_rect(BLACK, (view.right - fade_counter, (y + 1) * 100, view.width, 100))
             else:
                 game_state = "game_over"
                 
     elif game_state == "game_over":
         # Draw game over screen
         draw_text('GAME OVER!', font_big, BLACK, SCREEN_WIDTH // 2 - 100, 300)
-        draw_text('SCORE: ' + str(score), font_big, BLACK, SCREEN_WIDTH // 2 - 100, 350)
+        draw_text('SCORE: ' + str(sim.score), font_big, BLACK, SCREEN_WIDTH // 2 - 100, 350)
         draw_text('PRESS SPACE TO PLAY AGAIN', font_big, BLACK, SCREEN_WIDTH // 2 - 200, 400)
         draw_text('PRESS ESC FOR MENU', font_big, BLACK, SCREEN_WIDTH // 2 - 150, 450)
         
-        # Update high score
-        if score > high_score:
-            high_score = score
-            with open('score.txt', 'w') as file:
-                file.write(str(high_score))
-            # Update menu high score
-            menu.high_score = high_score
+        # Update high score from the leaderboard cache
+        if scores.high_score > high_score:
+            high_score = scores.high_score
             menu.load_high_score()
         
-        # Check for key presses
-        key = pygame.key.get_pressed()
-        if key[pygame.K_SPACE]:
+        # Check for key presses, once per press
+        controls.handled()
+        if controls.pressed('confirm'):
             # Reset the game and start playing
             reset_game()
-            game_over = False
             game_state = "playing"
-        elif key[pygame.K_ESCAPE]:
+        elif controls.pressed('back'):
             # Go to menu
             menu.game_paused = False  # Not paused, new game
             game_state = "menu"
 
-    # Update display window
-    pygame.display.update()
+    # Draw the profiler overlay
+    if profiler.enabled:
+        dirty.add(draw_overlay())
+    profiler.lap('draw')
 
+    # Update display window
+    if last_state == "game_over":
+        dirty.invalidate()
+    dirty.present()
+    controls.presented()
+    assets.mark_first_frame()
+    profiler.lap('present')
+    profiler.end_frame()
+
+if sim:
+    sim.close()
+scores.close()
 pygame.quit()
\ No newline at end of file
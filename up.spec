@@ -1,11 +1,14 @@
 # -*- mode: python ; coding: utf-8 -*-
+# Build the asset archive first: python assetpack.py
+# Built as a folder rather than one file, so assets.pak is installed with
+# the executable and mapped in place instead of unpacked on every launch.
 
 
 a = Analysis(
     ['up.py'],
     pathex=[],
     binaries=[],
-    datas=[],
+    datas=[('assets.pak', '.')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
@@ -19,16 +22,13 @@ pyz = PYZ(a.pure)
 exe = EXE(
     pyz,
     a.scripts,
-    a.binaries,
-    a.datas,
     [],
+    exclude_binaries=True,
     name='up',
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
-    upx_exclude=[],
-    runtime_tmpdir=None,
+    upx=False,
     console=True,
     disable_windowed_traceback=False,
     argv_emulation=False,
@@ -36,3 +36,12 @@ exe = EXE(
     codesign_identity=None,
     entitlements_file=None,
 )
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='up',
+)
@@ -0,0 +1,176 @@
+import sys
+import time
+import functools
+import multiprocessing
+import numpy as np
+from simulation import Simulation, load_assets, INPUT_LEFT, INPUT_RIGHT
+from level import LevelGenerator
+
+# Observation layout, all relative to the player where it makes sense:
+# player centre x, player bottom y, vertical velocity, difficulty speed;
+# the OBS_PLATFORMS platforms nearest the player's feet as (dx, dy, width,
+# moving); then the first bird as (present, dx, dy, direction)
+OBS_PLATFORMS = 5
+OBS_SIZE = 4 + 4 * OBS_PLATFORMS + 4
+
+# Valid actions are the Simulation input bits
+ACTIONS = [0, INPUT_LEFT, INPUT_RIGHT]
+
+
+def observe(sim, out):
+    player = sim.player.rect
+    out[:] = 0
+    out[0] = player.centerx
+    out[1] = player.bottom
+    out[2] = sim.player.vel_y
+    out[3] = sim.speed
+    nearest = sorted(sim.platform_group, key=lambda platform: abs(platform.rect.top - player.bottom))
+    for i, platform in enumerate(nearest[:OBS_PLATFORMS]):
+        base = 4 + 4 * i
+        out[base] = platform.rect.centerx - player.centerx
+        out[base + 1] = platform.rect.top - player.bottom
+        out[base + 2] = platform.rect.width
+        out[base + 3] = platform.moving
+    for enemy in sim.enemy_group:
+        base = 4 + 4 * OBS_PLATFORMS
+        out[base] = 1
+        out[base + 1] = enemy.rect.centerx - player.centerx
+        out[base + 2] = enemy.rect.centery - player.centery
+        out[base + 3] = enemy.direction
+        break
+
+
+# A slice of the instances, stepped in this process. Instance i plays the
+# seeds seed + i, seed + i + num_envs, ... one per episode, so the seeds
+# never depend on how the instances are split across processes.
+class EnvBatch():
+    def __init__(self, indices, num_envs, seed=0, platform_gap=(80, 120), assets=None):
+        assets = assets or load_assets()
+        self.indices = list(indices)
+        self.num_envs = num_envs
+        self.seed = seed
+        self.episodes = [0] * len(self.indices)
+        # The same chunked levels as the game, built synchronously; a
+        # generator thread per instance would only get in the way here
+        level = functools.partial(LevelGenerator, threaded=False)
+        self.sims = [Simulation(assets, seed=self.episode_seed(i), platform_gap=platform_gap, level=level)
+                     for i in range(len(self.indices))]
+        self.obs = np.zeros((len(self.sims), OBS_SIZE), dtype=np.float32)
+        self.rewards = np.zeros(len(self.sims), dtype=np.float32)
+        self.dones = np.zeros(len(self.sims), dtype=bool)
+        self.final_scores = np.zeros(len(self.sims), dtype=np.int64)
+
+    def episode_seed(self, i):
+        return self.seed + self.indices[i] + self.episodes[i] * self.num_envs
+
+    def reset(self):
+        for i, sim in enumerate(self.sims):
+            self.episodes[i] = 0
+            sim.reset(self.episode_seed(i))
+            observe(sim, self.obs[i])
+        return self.obs.copy()
+
+    def step(self, actions):
+        # Rewards are the score gained this tick. A finished instance
+        # starts its next episode straight away, so its observation is the
+        # new episode's first; final_scores holds the score it ended on.
+        self.final_scores[:] = 0
+        for i, sim in enumerate(self.sims):
+            score = sim.score
+            sim.step(int(actions[i]))
+            self.rewards[i] = sim.score - score
+            self.dones[i] = sim.game_over
+            if sim.game_over:
+                self.final_scores[i] = sim.score
+                self.episodes[i] += 1
+                sim.reset(self.episode_seed(i))
+            observe(sim, self.obs[i])
+        return self.obs.copy(), self.rewards.copy(), self.dones.copy(), self.final_scores.copy()
+
+    def close(self):
+        for sim in self.sims:
+            sim.close()
+
+
+def worker(connection, indices, num_envs, seed, platform_gap):
+    batch = EnvBatch(indices, num_envs, seed, platform_gap)
+    while True:
+        command, actions = connection.recv()
+        if command == 'step':
+            connection.send(batch.step(actions))
+        elif command == 'reset':
+            connection.send(batch.reset())
+        else:
+            batch.close()
+            connection.close()
+            return
+
+
+# N independent games advanced in lock-step with no rendering: step() takes
+# one action per instance and returns arrays of observations, rewards, done
+# flags and final scores. Every instance is the game's own Simulation, so the
+# physics are exactly those of the interactive game. With workers > 1 the
+# instances are split across that many processes.
+class VectorEnv():
+    def __init__(self, num_envs, seed=0, platform_gap=(80, 120), workers=1):
+        self.num_envs = num_envs
+        self.batch = None
+        self.connections = []
+        self.processes = []
+        if workers <= 1:
+            self.batch = EnvBatch(range(num_envs), num_envs, seed, platform_gap)
+            return
+        self.slices = np.array_split(np.arange(num_envs), workers)
+        for indices in self.slices:
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=worker, args=(child, indices.tolist(), num_envs, seed, platform_gap),
+                                              daemon=True)
+            process.start()
+            child.close()
+            self.connections.append(parent)
+            self.processes.append(process)
+
+    def reset(self):
+        if self.batch:
+            return self.batch.reset()
+        for connection in self.connections:
+            connection.send(('reset', None))
+        return np.concatenate([connection.recv() for connection in self.connections])
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+        if self.batch:
+            return self.batch.step(actions)
+        # Send every slice before waiting on any, so the workers run together
+        for connection, indices in zip(self.connections, self.slices):
+            connection.send(('step', actions[indices]))
+        results = [connection.recv() for connection in self.connections]
+        return tuple(np.concatenate(parts) for parts in zip(*results))
+
+    def close(self):
+        if self.batch:
+            self.batch.close()
+        for connection in self.connections:
+            connection.send(('close', None))
+        for process in self.processes:
+            process.join()
+        self.connections = []
+        self.processes = []
+
+
+# python vecenv.py [envs] [workers] [ticks]: random play, for throughput
+if __name__ == '__main__':
+    num_envs, workers, ticks = [int(arg) for arg in sys.argv[1:4]] + [64, 1, 2000][len(sys.argv[1:4]):]
+    env = VectorEnv(num_envs, workers=workers)
+    env.reset()
+    rng = np.random.default_rng(0)
+    scores = []
+    start = time.perf_counter()
+    for tick in range(ticks):
+        obs, rewards, dones, final_scores = env.step(rng.choice(ACTIONS, num_envs))
+        scores.extend(final_scores[dones].tolist())
+    elapsed = time.perf_counter() - start
+    env.close()
+    print(f'{num_envs * ticks / elapsed:,.0f} ticks/s over {num_envs} instances in {workers} process(es)')
+    if scores:
+        print(f'{len(scores)} episodes, mean score {sum(scores) / len(scores):.0f}')